@@ -0,0 +1,164 @@
+import time
+import asyncio
+from collections import deque
+from logger import get_logger
+
+logger = get_logger("bot.admission")
+
+LOG_EVERY = 20
+
+
+class AdmissionController:
+    # Admission control in front of handle_query:
+    # - at most max_concurrent requests run at once (retrieval + LLM);
+    # - one in-flight request per user; messages sent while a request is
+    #   queued or running are coalesced so only the newest one is answered;
+    # - waiting users get their queue position in the wait message, sent by
+    #   one background task at most every position_interval seconds and in
+    #   batches of notify_batch edits, so Telegram never delays admission;
+    # - new users are rejected once max_queue users are already waiting.
+
+    def __init__(
+        self,
+        handler,
+        notify,
+        max_concurrent=4,
+        max_queue=50,
+        position_interval=3.0,
+        notify_batch=10,
+    ):
+        self.handler = handler
+        self.notify = notify
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.position_interval = position_interval
+        self.notify_batch = notify_batch
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._queue = deque()
+        self._pending = {}
+        self._tasks = {}
+        self._last_position = {}
+        self._positions_dirty = False
+        self._reporter = None
+        self.running = 0
+        self.started = 0
+        self.shed = 0
+        self.coalesced = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def submit(self, user_id, message, wait_msg):
+        if user_id in self._tasks:
+            # User already has a request queued or running: keep only the newest
+            replaced = self._pending.get(user_id)
+            self._pending[user_id] = (message, wait_msg, time.monotonic())
+            self.coalesced += 1
+            if replaced is not None:
+                await self.notify(replaced[1], "Вопрос заменён вашим более новым сообщением.")
+            elif user_id not in self._queue:
+                await self.notify(
+                    wait_msg, "Отвечу на это сообщение сразу после предыдущего вопроса."
+                )
+            return True
+
+        if len(self._queue) >= self.max_queue:
+            self.shed += 1
+            logger.warning(
+                f"Queue full ({len(self._queue)} waiting), rejecting user {user_id}. Shed so far: {self.shed}"
+            )
+            await self.notify(
+                wait_msg, "Сервис сейчас перегружен, пожалуйста повторите попытку через несколько минут."
+            )
+            return False
+
+        self._pending[user_id] = (message, wait_msg, time.monotonic())
+        self._queue.append(user_id)
+        self._tasks[user_id] = asyncio.create_task(self._serve_user(user_id))
+        return True
+
+    async def _serve_user(self, user_id):
+        try:
+            while user_id in self._pending:
+                if user_id not in self._queue:
+                    # Follow-up message from the same user goes to the back of the queue
+                    self._queue.append(user_id)
+                self._positions_changed()
+                try:
+                    await self._semaphore.acquire()
+                finally:
+                    self._queue.remove(user_id)
+                    self._last_position.pop(user_id, None)
+
+                try:
+                    # Take the newest message at the moment a slot frees up
+                    message, wait_msg, enqueued_at = self._pending.pop(user_id)
+                    self._record_start(time.monotonic() - enqueued_at)
+                    self._positions_changed()
+                    await self.handler(message, wait_msg)
+                except Exception:
+                    logger.exception(f"Admitted request failed for user {user_id}")
+                finally:
+                    self.running -= 1
+                    self._semaphore.release()
+        finally:
+            self._tasks.pop(user_id, None)
+
+    def _positions_changed(self):
+        self._positions_dirty = True
+        if self._reporter is None or self._reporter.done():
+            self._reporter = asyncio.create_task(self._report_positions())
+
+    async def _report_positions(self):
+        # Changes made while a round is being sent or during the pause after
+        # it are coalesced into the next round
+        while self._positions_dirty:
+            self._positions_dirty = False
+            updates = []
+            for position, user_id in enumerate(list(self._queue), start=1):
+                if self._last_position.get(user_id) == position:
+                    continue
+                self._last_position[user_id] = position
+                pending = self._pending.get(user_id)
+                if pending is None:
+                    continue
+                if position == 1 and self.running < self.max_concurrent:
+                    continue
+                updates.append(
+                    (
+                        pending[1],
+                        f"Генерирую ответ, пожалуйста подождите несколько минут...\nВаш номер в очереди: {position}",
+                    )
+                )
+
+            for start in range(0, len(updates), self.notify_batch):
+                batch = updates[start : start + self.notify_batch]
+                results = await asyncio.gather(
+                    *[self.notify(wait_msg, text) for wait_msg, text in batch],
+                    return_exceptions=True,
+                )
+                for result in results:
+                    if isinstance(result, Exception):
+                        logger.debug(f"Queue position update failed: {result}")
+            await asyncio.sleep(self.position_interval)
+
+    def _record_start(self, wait):
+        self.running += 1
+        self.started += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if wait > 5:
+            logger.info(f"Request waited {wait:.1f}s for a slot ({len(self._queue)} still queued)")
+        if self.started % LOG_EVERY == 0:
+            logger.info(f"Admission stats: {self.stats()}")
+
+    def stats(self):
+        started = self.started or 1
+        return {
+            "running": self.running,
+            "queued": len(self._queue),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "shed": self.shed,
+            "avg_wait": round(self.total_wait / started, 3),
+            "max_wait": round(self.max_wait, 3),
+        }
@@ -8,7 +8,7 @@ def load_config():
     if not os.path.exists(CONFIG_PATH):
         raise FileNotFoundError(f"Config file not found at {CONFIG_PATH}")
 
-    with open(CONFIG_PATH, "r") as f:
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
         config = yaml.safe_load(f)
 
     if "reranker" not in config:
@@ -1,28 +1,45 @@
 import os
 import re
-import aiohttp
+import json
+import time
 import asyncio
 
+import aiohttp
 from aiogram import Bot, Dispatcher
 from aiogram.types import Message
 from aiogram.filters import Command
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
 from aiogram.fsm.storage.memory import MemoryStorage
-
-from startup import load_models
-from retrieval import get_reranked_law_articles, get_reranked_case_chunks
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
+
+from startup import (
+    load_models,
+    load_cache,
+    load_semantic_cache,
+    load_score_cache,
+    load_admission_settings,
+    load_search_params,
+    load_retrieval_filters,
+    load_text_stores,
+)
+from admission import AdmissionController
+from retrieval import get_reranked_context
+from retrieval.http_client import get_http_session, close_http_session
 from logger import get_logger
 
 logger = get_logger("bot")
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN_2")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "local")
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+# Telegram allows roughly one edit per second per chat
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", 1.5))
 
 bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 dp = Dispatcher(storage=MemoryStorage())
 
-LLM_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+LLM_API_URL = os.getenv("LLM_API_URL", "https://openrouter.ai/api/v1/chat/completions")
 MODEL_ID = "deepseek/deepseek-r1:free"
 
 
@@ -44,36 +61,45 @@ async def message_handler(message: Message):
             "Генерирую ответ, пожалуйста подождите несколько минут..."
         )
 
-        # Run logic in background to avoid blocking the bot
-        asyncio.create_task(handle_query(message, wait_msg))
+        # Queue the request; admission control runs it in the background
+        await admission.submit(user_id, message, wait_msg)
 
     except Exception as e:
         logger.exception(f"Immediate failure for user {user_id}")
         await message.answer("Техническая ошибка, пожалуйста повторите попытку позже.")
 
 
+async def notify_wait_message(wait_msg: Message, text: str):
+    try:
+        await bot.edit_message_text(
+            chat_id=wait_msg.chat.id, message_id=wait_msg.message_id, text=text
+        )
+    except Exception as e:
+        logger.debug(f"Couldn't update wait message: {e}")
+
+
 async def handle_query(message: Message, wait_msg: Message):
     user_id = message.from_user.id
     try:
         query_text = message.text
-        global embedder, reranker, client
-
-        law_docs = await get_reranked_law_articles(
-            query=query_text,
-            embedder=embedder,
-            reranker=reranker,
-            client=client,
-            inference_backend=INFERENCE_BACKEND,
-            remote_reranker_model="BAAI/bge-reranker-v2-m3",
-        )
+        global embedder, reranker, client, cache, semantic_cache, score_cache, search_params
+        global law_filter, case_filter, law_text_store, case_text_store
 
-        case_docs = await get_reranked_case_chunks(
+        law_docs, case_docs = await get_reranked_context(
             query=query_text,
             embedder=embedder,
             reranker=reranker,
             client=client,
             inference_backend=INFERENCE_BACKEND,
             remote_reranker_model="BAAI/bge-reranker-v2-m3",
+            cache=cache,
+            semantic_cache=semantic_cache,
+            score_cache=score_cache,
+            search_params=search_params,
+            law_filter=law_filter,
+            case_filter=case_filter,
+            law_text_store=law_text_store,
+            case_text_store=case_text_store,
         )
 
         law_texts = [doc["text"] for doc in law_docs]
@@ -101,6 +127,10 @@ async def handle_query(message: Message, wait_msg: Message):
         }
 
         messages = [system_prompt, {"role": "user", "content": query_text}]
+        if STREAM_RESPONSES:
+            await deliver_streamed_response(messages, wait_msg)
+            return
+
         response_text = await query_llm(messages)
 
         # Replace waiting message with the response
@@ -129,9 +159,8 @@ async def handle_query(message: Message, wait_msg: Message):
             logger.error(f"Couldn't edit wait message: {edit_error}")
 
 
-async def query_llm(messages):
-    headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}"}
-    payload = {
+def build_llm_payload(messages, stream=False):
+    return {
         "model": MODEL_ID,
         "messages": messages,
         "top_p": 1,
@@ -140,22 +169,138 @@ async def query_llm(messages):
         "presence_penalty": 0,
         "repetition_penalty": 1,
         "top_k": 0,
+        "stream": stream,
     }
 
+
+async def query_llm(messages):
+    headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}"}
+    payload = build_llm_payload(messages)
+
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(LLM_API_URL, headers=headers, json=payload) as resp:
-                result = await resp.json()
-                return (
-                    result.get("choices", [{}])[0]
-                    .get("message", {})
-                    .get("content", "Ответ не получен.")
-                )
+        session = get_http_session()
+        async with session.post(LLM_API_URL, headers=headers, json=payload) as resp:
+            result = await resp.json()
+            return (
+                result.get("choices", [{}])[0]
+                .get("message", {})
+                .get("content", "Ответ не получен.")
+            )
     except Exception as e:
         logger.exception("Exception during LLM request")
         return "Техническая ошибка, пожалуйста повторите попытку позже."
 
 
+async def stream_llm(messages):
+    # Yields content deltas from the OpenRouter server-sent event stream
+    headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}"}
+    payload = build_llm_payload(messages, stream=True)
+
+    session = get_http_session()
+    async with session.post(LLM_API_URL, headers=headers, json=payload) as resp:
+        resp.raise_for_status()
+        async for raw_line in resp.content:
+            line = raw_line.decode("utf-8").strip()
+            # Skip blank separators and ": OPENROUTER PROCESSING" keep-alive comments
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            chunk = json.loads(data)
+            if "error" in chunk:
+                raise RuntimeError(f"LLM stream error: {chunk['error']}")
+            delta = chunk.get("choices", [{}])[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+def close_partial_html(text: str):
+    # Make a half-streamed answer safe for Telegram HTML: drop a trailing
+    # unfinished tag or entity and close tags that are still open
+    text = re.sub(r"<[^>]*$", "", text)
+    text = re.sub(r"&[#a-zA-Z0-9]*$", "", text)
+
+    open_tags = []
+    for closing, name in re.findall(r"<(/?)(b|i|u|s|a|code|pre)\b[^>]*>", text):
+        if not closing:
+            open_tags.append(name)
+        elif name in open_tags:
+            del open_tags[len(open_tags) - 1 - open_tags[::-1].index(name)]
+    return text + "".join(f"</{name}>" for name in reversed(open_tags))
+
+
+async def deliver_streamed_response(messages, wait_msg: Message):
+    chat_id = wait_msg.chat.id
+    message_ids = [wait_msg.message_id]
+    shown = [None]
+
+    async def render(text, final=False):
+        chunks = split_html_message(text if final else close_partial_html(text))
+        for i, chunk in enumerate(chunks):
+            if not chunk.strip() or (i < len(shown) and shown[i] == chunk):
+                continue
+            try:
+                if i < len(message_ids):
+                    await bot.edit_message_text(
+                        chat_id=chat_id, message_id=message_ids[i], text=chunk
+                    )
+                    shown[i] = chunk
+                else:
+                    # Answer outgrew 4096 chars: continue in a new message
+                    sent = await bot.send_message(chat_id=chat_id, text=chunk)
+                    message_ids.append(sent.message_id)
+                    shown.append(chunk)
+            except TelegramRetryAfter as e:
+                if not final:
+                    logger.warning(f"Telegram rate limit while streaming, backing off {e.retry_after}s")
+                    return
+                await asyncio.sleep(e.retry_after)
+                await render(text, final=True)
+                return
+            except TelegramBadRequest as e:
+                # Intermediate renders may contain HTML Telegram rejects; the next one will fix it
+                if final:
+                    raise
+                logger.debug(f"Skipped partial edit: {e}")
+            except (TelegramAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # A failed intermediate edit must not abort a healthy stream;
+                # only the final render is allowed to fail the answer
+                if final:
+                    raise
+                logger.warning(f"Skipped partial edit after {e!r}")
+                return
+
+    text = ""
+    last_render = time.monotonic()
+    try:
+        async for delta in stream_llm(messages):
+            text += delta
+            if time.monotonic() - last_render >= STREAM_EDIT_INTERVAL:
+                await render(text)
+                last_render = time.monotonic()
+    except Exception:
+        if not text.strip():
+            raise
+        # Keep the part of the answer the user has already seen and report
+        # the failure in a separate message instead of overwriting it
+        logger.exception("LLM stream failed after a partial answer")
+        try:
+            await render(text)
+            await bot.send_message(
+                chat_id=chat_id,
+                text="Ответ прерван из-за технической ошибки, пожалуйста повторите попытку позже.",
+            )
+        except Exception as e:
+            logger.error(f"Couldn't report the interrupted answer: {e}")
+        return
+
+    if not text.strip():
+        text = "Ответ не получен."
+    await render(text, final=True)
+
+
 def split_html_message(text: str, max_len: int = 4096):
     # Convert <br> to newline
     text = re.sub(r"<br\s*/?>", "\n", text, flags=re.IGNORECASE)
@@ -218,10 +363,23 @@ def split_html_message(text: str, max_len: int = 4096):
 
 
 async def main():
-    global embedder, reranker, client
+    global embedder, reranker, client, cache, semantic_cache, score_cache, search_params
+    global law_filter, case_filter, law_text_store, case_text_store, admission
     embedder, reranker, client = load_models()
+    cache = load_cache()
+    semantic_cache = load_semantic_cache(cache)
+    score_cache = load_score_cache()
+    search_params = load_search_params()
+    law_filter, case_filter = load_retrieval_filters()
+    law_text_store, case_text_store = load_text_stores()
+    admission = AdmissionController(
+        handler=handle_query, notify=notify_wait_message, **load_admission_settings()
+    )
     logger.info("Models loaded. Bot is running...")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await close_http_session()
 
 
 if __name__ == "__main__":
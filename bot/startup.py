@@ -1,10 +1,124 @@
-from sentence_transformers import SentenceTransformer
-from retrieval import ONNXReranker
-from retrieval import get_qdrant_client
+from retrieval import ONNXReranker, BatchingReranker
+from retrieval import get_qdrant_client, load_dense_model, RetrievalCache, SemanticCache, ScoreCache
+from retrieval import build_search_params, build_filter, open_text_store, text_store_path
+from retrieval.tools import LAWS_COLLECTION, CASES_COLLECTION
+from bot.load_config import load_config
 
 
 def load_models():
-    embedder = SentenceTransformer("BAAI/bge-m3", trust_remote_code=True)
-    reranker = ONNXReranker()
+    config = load_config()
+    embedder_config = config.get("embedder_model", {})
+    batching = embedder_config.get("batching", {})
+
+    embedder = load_dense_model(
+        embedder_config.get("model_name", "BAAI/bge-m3"),
+        batching=batching.get("enabled", False),
+        max_batch_size=batching.get("max_batch_size", 16),
+        max_wait_ms=batching.get("max_wait_ms", 5),
+    )
+
+    reranker_config = config["reranker"]
+    reranker = ONNXReranker(
+        max_tokens_per_run=reranker_config.get("max_tokens_per_run", 16384)
+    )
+    reranker_batching = reranker_config.get("batching", {})
+    if reranker_batching.get("enabled", False):
+        reranker = BatchingReranker(
+            reranker,
+            max_batch_size=reranker_batching.get("max_batch_size", 64),
+            max_wait_ms=reranker_batching.get("max_wait_ms", 10),
+        )
+
     client = get_qdrant_client()
     return embedder, reranker, client
+
+
+def load_cache():
+    config = load_config()
+    cache_config = config.get("cache", {})
+    if not cache_config.get("enabled", False):
+        return None
+
+    # Entries are only valid for this embedder + reranker combination
+    namespace = "|".join(
+        [
+            config.get("embedder_model", {}).get("model_name", "BAAI/bge-m3"),
+            config["reranker"].get("model_path") or config["reranker"].get("model_name", ""),
+        ]
+    )
+    return RetrievalCache(
+        namespace=namespace,
+        max_entries=cache_config.get("max_entries", 1024),
+        ttl_seconds=cache_config.get("ttl_seconds", 24 * 3600),
+        db_path=cache_config.get("disk_path"),
+    )
+
+
+def load_semantic_cache(retrieval_cache=None):
+    config = load_config()
+    semantic_config = config.get("semantic_cache", {})
+    if not semantic_config.get("enabled", False):
+        return None
+
+    return SemanticCache(
+        capacity=semantic_config.get("capacity", 512),
+        threshold=semantic_config.get("threshold", 0.95),
+        ttl_seconds=semantic_config.get("ttl_seconds", 24 * 3600),
+        generations=retrieval_cache,
+    )
+
+
+def load_score_cache():
+    config = load_config()
+    score_config = config.get("score_cache", {})
+    if not score_config.get("enabled", False):
+        return None
+
+    return ScoreCache(
+        max_entries=score_config.get("max_entries", 50000),
+        eviction=score_config.get("eviction", "lru"),
+    )
+
+
+def load_admission_settings():
+    admission_config = load_config().get("admission", {})
+    return {
+        "max_concurrent": admission_config.get("max_concurrent", 4),
+        "max_queue": admission_config.get("max_queue", 50),
+        "position_interval": admission_config.get("position_interval", 3.0),
+        "notify_batch": admission_config.get("notify_batch", 10),
+    }
+
+
+def load_search_params():
+    return build_search_params(load_config().get("search"))
+
+
+def load_retrieval_filters():
+    filters_config = load_config().get("filters", {})
+    law_filter = build_filter(**(filters_config.get("laws") or {}))
+    case_filter = build_filter(**(filters_config.get("cases") or {}))
+    return law_filter, case_filter
+
+
+def load_text_stores():
+    # Only for collections ingested with `text_store: true`; the others keep
+    # their texts in the Qdrant payload
+    store_config = load_config().get("text_store", {})
+    refresh_seconds = store_config.get("refresh_seconds", 30)
+    stores = []
+    for kind, collection_name in (("laws", LAWS_COLLECTION), ("cases", CASES_COLLECTION)):
+        if not store_config.get(kind, False):
+            stores.append(None)
+            continue
+        store = open_text_store(collection_name, refresh_seconds=refresh_seconds)
+        if store is None:
+            # Without it every candidate would be dropped and answers would
+            # come without any legal context
+            raise FileNotFoundError(
+                f"Text store for '{collection_name}' is enabled in bot/config.yaml but "
+                f"missing at {text_store_path(collection_name)}; copy it from the "
+                "ingestion host or disable it"
+            )
+        stores.append(store)
+    return tuple(stores)
@@ -0,0 +1,74 @@
+import json
+import time
+import asyncio
+import argparse
+import pandas as pd
+
+from retrieval import load_dense_model
+from retrieval.tools import encode_dense
+from retrieval.batching import BatchingEncoder
+from logger import get_logger
+
+logger = get_logger()
+
+QUERIES_PATH = "evaluation/eval_dset_laws.json"
+OUTPUT_PATH = "eval_results/encoder_batching_benchmark.csv"
+CONCURRENCY_LEVELS = [1, 8, 32]
+
+
+async def run_users(embedder, queries, concurrency):
+    # Every simulated user sends its share of queries one after another
+    async def user(user_queries):
+        for query in user_queries:
+            await encode_dense(embedder, query)
+
+    shards = [queries[i::concurrency] for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(user(shard) for shard in shards))
+    return len(queries) / (time.perf_counter() - start)
+
+
+async def main(model_name, max_batch_size, max_wait_ms, num_queries):
+    with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+        queries = [sample["query"] for sample in json.load(f)][:num_queries]
+
+    model = load_dense_model(model_name)
+    batched = BatchingEncoder(
+        model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+    )
+
+    # Warm up weights and tokenizer before timing
+    model.encode(queries[:4], normalize_embeddings=True)
+
+    results = []
+    for concurrency in CONCURRENCY_LEVELS:
+        baseline_qps = await run_users(model, queries, concurrency)
+        batched_qps = await run_users(batched, queries, concurrency)
+        logger.info(
+            f"users={concurrency}: unbatched {baseline_qps:.2f} q/s, batched {batched_qps:.2f} q/s "
+            f"(avg batch {batched.stats()['avg_requests_per_batch']})"
+        )
+        results.append(
+            {
+                "concurrent_users": concurrency,
+                "unbatched_qps": round(baseline_qps, 2),
+                "batched_qps": round(batched_qps, 2),
+                "speedup": round(batched_qps / baseline_qps, 2),
+            }
+        )
+
+    df = pd.DataFrame(results)
+    df.to_csv(OUTPUT_PATH, index=False)
+    print(df.to_string(index=False))
+    logger.info(f"Saved benchmark to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark query encoder micro-batching.")
+    parser.add_argument("--model", default="BAAI/bge-m3")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--num-queries", type=int, default=128)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.model, args.max_batch_size, args.max_wait_ms, args.num_queries))
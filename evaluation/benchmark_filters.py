@@ -0,0 +1,98 @@
+import time
+import pickle
+import asyncio
+import argparse
+import numpy as np
+import pandas as pd
+
+from retrieval import get_qdrant_client, search_with_precomputed_vectors, build_filter
+from retrieval.tools import LAWS_COLLECTION, CASES_COLLECTION
+from evaluation.semantic_cache_eval import compute_metrics
+from evaluation.benchmark_quantization import to_articles
+from logger import get_logger
+
+logger = get_logger()
+
+EVAL_PATH = "evaluation/eval_query_all_embeddings.pkl"
+OUTPUT_PATH = "eval_results/filtered_search_latency.csv"
+CASE_CODES = ["УК РФ", "КоАП РФ", "ГК РФ"]
+
+
+async def timed_search(client, collection_name, vector, k, query_filter=None):
+    start = time.perf_counter()
+    res = await search_with_precomputed_vectors(
+        client=client,
+        collection_name=collection_name,
+        top_k=k,
+        retriever_type="dense",
+        dense_vector=vector.tolist(),
+        query_filter=query_filter,
+    )
+    return res.points, time.perf_counter() - start
+
+
+def summarize(collection, label, latencies, recall=None):
+    return {
+        "collection": collection,
+        "filter": label,
+        "queries": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+        "Recall@10": None if recall is None else round(float(recall), 3),
+    }
+
+
+async def main(k):
+    with open(EVAL_PATH, "rb") as f:
+        eval_dset = pickle.load(f)
+    vectors = np.asarray(eval_dset["BAAI/bge-m3"], dtype=np.float32)
+    relevant_articles = eval_dset["relevant_articles"]
+
+    client = get_qdrant_client()
+    # Warm up before timing
+    for vector in vectors[:20]:
+        await timed_search(client, LAWS_COLLECTION, vector, k)
+
+    # Laws: restrict each question to the code of its first gold article
+    results = []
+    for label in ["none", "law_code of gold article"]:
+        latencies = []
+        metrics = []
+        for vector, relevant in zip(vectors, relevant_articles):
+            query_filter = None
+            if label != "none":
+                query_filter = build_filter(law_codes=[relevant[0]["law_code"]])
+            points, latency = await timed_search(
+                client, LAWS_COLLECTION, vector, k, query_filter
+            )
+            latencies.append(latency)
+            metrics.append(compute_metrics(to_articles(points), relevant, k))
+        recall = np.mean([row[-1] for row in metrics])
+        results.append(summarize(LAWS_COLLECTION, label, latencies, recall))
+        logger.info(f"{results[-1]}")
+
+    # Cases: the same questions with and without a case_code restriction
+    for case_code in [None] + CASE_CODES:
+        query_filter = build_filter(case_codes=[case_code]) if case_code else None
+        latencies = []
+        for vector in vectors:
+            _, latency = await timed_search(client, CASES_COLLECTION, vector, k, query_filter)
+            latencies.append(latency)
+        results.append(summarize(CASES_COLLECTION, case_code or "none", latencies))
+        logger.info(f"{results[-1]}")
+
+    df = pd.DataFrame(results)
+    df.to_csv(OUTPUT_PATH, index=False)
+    print(df.to_string(index=False))
+    logger.info(f"Saved filtered search benchmark to {OUTPUT_PATH}")
+    await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare latency of filtered and unfiltered Qdrant queries."
+    )
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.k))
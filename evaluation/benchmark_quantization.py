@@ -0,0 +1,181 @@
+import time
+import pickle
+import asyncio
+import argparse
+import numpy as np
+import pandas as pd
+from qdrant_client.models import PointStruct
+
+from retrieval import get_qdrant_client, search_with_precomputed_vectors, build_search_params
+from retrieval.tools import LAWS_COLLECTION
+from ingestion.load_to_qdrant import create_collection, wait_until_ready
+from evaluation.semantic_cache_eval import compute_metrics
+from logger import get_logger
+
+logger = get_logger()
+
+EVAL_PATH = "evaluation/eval_query_all_embeddings.pkl"
+BASELINE_PATH = "eval_results/models_comparison_at10.csv"
+OUTPUT_PATH = "eval_results/quantization_benchmark_at10.csv"
+HNSW = {"m": 16, "ef_construct": 100}
+SEARCH = {"hnsw_ef": 128, "rescore": True, "oversampling": 2.0}
+
+# storage block (as in configs_retriever/*.yaml) and search block (as in bot/config.yaml)
+VARIANTS = {
+    "float32": ({"hnsw": HNSW}, {"hnsw_ef": 128}),
+    "float32_on_disk": ({"on_disk": True, "hnsw": HNSW}, {"hnsw_ef": 128}),
+    "scalar_int8": ({"on_disk": True, "hnsw": HNSW, "quantization": {"type": "scalar"}}, SEARCH),
+    "scalar_int8_no_rescore": (
+        {"on_disk": True, "hnsw": HNSW, "quantization": {"type": "scalar"}},
+        {"hnsw_ef": 128, "rescore": False},
+    ),
+    "binary": ({"on_disk": True, "hnsw": HNSW, "quantization": {"type": "binary"}}, SEARCH),
+}
+
+
+def estimate_ram_mb(storage, num_points, dim):
+    # Resident vector data: originals unless on_disk, quantized copies when
+    # kept in RAM, plus HNSW links (about 2 * m neighbours per point on layer 0)
+    quantization = storage.get("quantization", {}).get("type", "none")
+    total = 0 if storage.get("on_disk") else num_points * dim * 4
+    if quantization == "scalar":
+        total += num_points * dim
+    elif quantization == "binary":
+        total += num_points * dim / 8
+    total += num_points * storage.get("hnsw", {}).get("m", 16) * 2 * 4
+    return round(total / 2**20, 1)
+
+
+async def copy_collection(client, source, target, storage, dim, batch_size=256):
+    await create_collection(client, target, dim, storage)
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=["dense"],
+        )
+        await client.upsert(
+            collection_name=target,
+            points=[
+                PointStruct(id=p.id, vector={"dense": p.vector["dense"]}, payload=p.payload)
+                for p in points
+            ],
+            wait=True,
+        )
+        if offset is None:
+            break
+    await wait_until_ready(client, target)
+
+
+async def run_queries(client, collection_name, vectors, k, search_params):
+    retrieved = []
+    latencies = []
+    for vector in vectors:
+        start = time.perf_counter()
+        res = await search_with_precomputed_vectors(
+            client=client,
+            collection_name=collection_name,
+            top_k=k,
+            retriever_type="dense",
+            dense_vector=vector.tolist(),
+            search_params=search_params,
+        )
+        latencies.append(time.perf_counter() - start)
+        retrieved.append(res.points)
+    return retrieved, latencies
+
+
+def to_articles(points):
+    docs = []
+    for r in points:
+        meta = (r.payload or {}).get("metadata", {})
+        if meta.get("law_code") and meta.get("law_number"):
+            docs.append({"law_code": meta["law_code"], "law_number": meta["law_number"]})
+    return docs
+
+
+async def main(k, variants, keep):
+    with open(EVAL_PATH, "rb") as f:
+        eval_dset = pickle.load(f)
+    vectors = np.asarray(eval_dset["BAAI/bge-m3"], dtype=np.float32)
+    relevant_articles = eval_dset["relevant_articles"]
+
+    baseline = pd.read_csv(BASELINE_PATH).set_index("model")
+    baseline_recall = (
+        float(baseline.loc["BAAI/bge-m3", f"Recall@{k}"]) if k == 10 else None
+    )
+
+    client = get_qdrant_client()
+    num_points = (await client.count(LAWS_COLLECTION)).count
+    dim = vectors.shape[1]
+
+    # Exact float32 search is the reference for how many true neighbours survive
+    exact, _ = await run_queries(
+        client, LAWS_COLLECTION, vectors, k, build_search_params({"exact": True})
+    )
+    exact_ids = [{str(p.id) for p in points} for points in exact]
+
+    results = []
+    for name in variants:
+        storage, search = VARIANTS[name]
+        collection_name = f"{LAWS_COLLECTION}-bench-{name}"
+        logger.info(f"Building '{collection_name}' with storage {storage}")
+        await copy_collection(client, LAWS_COLLECTION, collection_name, storage, dim)
+
+        # Warm up caches and page in on-disk data before timing
+        await run_queries(client, collection_name, vectors[:20], k, build_search_params(search))
+        retrieved, latencies = await run_queries(
+            client, collection_name, vectors, k, build_search_params(search)
+        )
+
+        rows = [
+            compute_metrics(to_articles(points), rel, k)
+            for points, rel in zip(retrieved, relevant_articles)
+        ]
+        recall = np.mean([row[-1] for row in rows])
+        overlap = np.mean(
+            [
+                len({str(p.id) for p in points} & ids) / max(len(ids), 1)
+                for points, ids in zip(retrieved, exact_ids)
+            ]
+        )
+        results.append(
+            {
+                "variant": name,
+                "est_vector_ram_mb": estimate_ram_mb(storage, num_points, dim),
+                "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+                "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+                f"Recall@{k}": round(float(recall), 3),
+                f"baseline_Recall@{k}": baseline_recall,
+                f"exact_overlap@{k}": round(float(overlap), 3),
+            }
+        )
+        logger.info(f"{name}: {results[-1]}")
+
+        if not keep:
+            await client.delete_collection(collection_name)
+
+    df = pd.DataFrame(results)
+    df.to_csv(OUTPUT_PATH, index=False)
+    print(df.to_string(index=False))
+    logger.info(f"Saved quantization benchmark to {OUTPUT_PATH}")
+    await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare quantization and on-disk storage variants of the laws collection."
+    )
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS)
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the benchmark collections afterwards"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(args.k, args.variants, args.keep))
@@ -2,16 +2,19 @@ import json
 import asyncio
 import os
 import time
-import aiohttp
 
-from bot.startup import load_models
-from retrieval import get_reranked_law_articles, get_reranked_case_chunks
+from bot.startup import load_models, load_text_stores
+from retrieval import get_reranked_context, get_reranked_context_batch
+from retrieval.http_client import get_http_session, close_http_session
 from logger import get_logger
 
 INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "local")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-LLM_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+LLM_API_URL = os.getenv("LLM_API_URL", "https://openrouter.ai/api/v1/chat/completions")
 MODEL_ID = "deepseek/deepseek-r1"
+# Questions retrieved per batch call (one encode, one Qdrant request per collection)
+RETRIEVAL_BATCH_SIZE = int(os.getenv("RETRIEVAL_BATCH_SIZE", 32))
+UNANSWERED = ["", "Ответ не получен.", "ERROR"]
 
 logger = get_logger()
 
@@ -75,25 +78,25 @@ async def query_llm(messages, max_retries=5, retry_delay=2):
 
     for attempt in range(max_retries):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(LLM_API_URL, headers=headers, json=payload) as resp:
-                    if resp.status != 200:
-                        logger.warning(f"LLM request failed with status {resp.status}")
-                        await asyncio.sleep(retry_delay)
-                        continue
-
-                    result = await resp.json()
-                    content = (
-                        result.get("choices", [{}])[0]
-                        .get("message", {})
-                        .get("content", "")
-                    )
-                    if not content.strip() or "Техническая ошибка" in content:
-                        logger.warning(f"Empty or error content (attempt {attempt + 1})")
-                        await asyncio.sleep(retry_delay)
-                        continue
+            session = get_http_session()
+            async with session.post(LLM_API_URL, headers=headers, json=payload) as resp:
+                if resp.status != 200:
+                    logger.warning(f"LLM request failed with status {resp.status}")
+                    await asyncio.sleep(retry_delay)
+                    continue
+
+                result = await resp.json()
+                content = (
+                    result.get("choices", [{}])[0]
+                    .get("message", {})
+                    .get("content", "")
+                )
+                if not content.strip() or "Техническая ошибка" in content:
+                    logger.warning(f"Empty or error content (attempt {attempt + 1})")
+                    await asyncio.sleep(retry_delay)
+                    continue
 
-                    return content.strip()
+                return content.strip()
 
         except Exception as e:
             logger.warning(f"Exception during LLM query (attempt {attempt + 1})")
@@ -117,6 +120,36 @@ async def run_eval(input_path, output_path):
     answered_map = {entry["question"]: entry for entry in results}
 
     embedder, reranker, client = load_models()
+    law_text_store, case_text_store = load_text_stores()
+
+    # Retrieval for all questions that still need a RAG answer runs up front
+    # in batches; the per-question path below is only a fallback
+    contexts = {}
+    if INFERENCE_BACKEND == "local":
+        pending = []
+        for sample in dataset:
+            question = sample.get("question", "").strip()
+            existing = answered_map.get(question, {})
+            if question and existing.get("rag", "").strip() in UNANSWERED:
+                pending.append(question)
+        pending = list(dict.fromkeys(pending))
+
+        for start in range(0, len(pending), RETRIEVAL_BATCH_SIZE):
+            batch = pending[start : start + RETRIEVAL_BATCH_SIZE]
+            try:
+                batch_contexts = await get_reranked_context_batch(
+                    batch,
+                    embedder=embedder,
+                    reranker=reranker,
+                    client=client,
+                    law_text_store=law_text_store,
+                    case_text_store=case_text_store,
+                )
+            except Exception:
+                logger.exception(f"Batch retrieval failed for questions {start}-{start + len(batch)}")
+                continue
+            contexts.update(zip(batch, batch_contexts))
+            logger.info(f"Retrieved context for {len(contexts)}/{len(pending)} questions")
 
     for idx, sample in enumerate(dataset):
         question = sample.get("question", "").strip()
@@ -129,7 +162,7 @@ async def run_eval(input_path, output_path):
         existing = answered_map.get(question)
 
         if existing:
-            if all(existing.get(k, "").strip() not in ["", "Ответ не получен.", "ERROR"]
+            if all(existing.get(k, "").strip() not in UNANSWERED
                    for k in ["zero_shot", "rag"]):
                 logger.info(f"Skipping already completed: {question[:60]}")
                 continue
@@ -139,28 +172,25 @@ async def run_eval(input_path, output_path):
         logger.info(f"[{idx + 1}/{len(dataset)}] Processing: {question[:60]}")
 
         try:
-            if existing.get("zero_shot", "").strip() in ["", "Ответ не получен.", "ERROR"]:
+            if existing.get("zero_shot", "").strip() in UNANSWERED:
                 zero_prompt = [build_system_prompt_zero(), {"role": "user", "content": question}]
                 existing["zero_shot"] = await query_llm(zero_prompt)
                 log_preview("Zero-shot response", existing["zero_shot"])
 
-            if existing.get("rag", "").strip() in ["", "Ответ не получен.", "ERROR"]:
-                law_docs = await get_reranked_law_articles(
-                    query=question,
-                    embedder=embedder,
-                    reranker=reranker,
-                    client=client,
-                    inference_backend=INFERENCE_BACKEND,
-                    remote_reranker_model="BAAI/bge-reranker-v2-m3",
-                )
-                case_docs = await get_reranked_case_chunks(
-                    query=question,
-                    embedder=embedder,
-                    reranker=reranker,
-                    client=client,
-                    inference_backend=INFERENCE_BACKEND,
-                    remote_reranker_model="BAAI/bge-reranker-v2-m3",
-                )
+            if existing.get("rag", "").strip() in UNANSWERED:
+                if question in contexts:
+                    law_docs, case_docs = contexts.pop(question)
+                else:
+                    law_docs, case_docs = await get_reranked_context(
+                        query=question,
+                        embedder=embedder,
+                        reranker=reranker,
+                        client=client,
+                        inference_backend=INFERENCE_BACKEND,
+                        remote_reranker_model="BAAI/bge-reranker-v2-m3",
+                        law_text_store=law_text_store,
+                        case_text_store=case_text_store,
+                    )
 
                 law_texts = [doc["text"] for doc in law_docs]
                 case_texts = [doc["text"] for doc in case_docs]
@@ -195,5 +225,12 @@ async def run_eval(input_path, output_path):
     logger.info(f"✅ Finished. Final results saved to {output_path}")
 
 
+async def main():
+    try:
+        await run_eval("generation_eval_dset.json", "generation_eval_results.json")
+    finally:
+        await close_http_session()
+
+
 if __name__ == "__main__":
-    asyncio.run(run_eval("generation_eval_dset.json", "generation_eval_results.json"))
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+import pickle
+import asyncio
+import argparse
+import numpy as np
+import pandas as pd
+
+from retrieval import get_qdrant_client, search_with_precomputed_vectors, SemanticCache
+from logger import get_logger
+
+logger = get_logger()
+
+EVAL_PATH = "evaluation/eval_query_all_embeddings.pkl"
+OUTPUT_PATH = "eval_results/semantic_cache_thresholds_at10.csv"
+COLLECTION_NAME = "bge-laws-2048-chunks"
+THRESHOLDS = [0.99, 0.97, 0.95, 0.93, 0.9]
+
+
+def compute_metrics(retrieved, relevant, k):
+    top_k = retrieved[:k]
+    relevant_set = set((g["law_code"], g["law_number"]) for g in relevant)
+
+    correct = [pred for pred in top_k if (pred["law_code"], pred["law_number"]) in relevant_set]
+    precision_at_k = len(correct) / k
+    recall_at_k = len(correct) / len(relevant) if relevant else 0.0
+
+    hits = 0
+    ap = 0.0
+    for i, pred in enumerate(top_k):
+        if (pred["law_code"], pred["law_number"]) in relevant_set:
+            hits += 1
+            ap += hits / (i + 1)
+    map_at_k = ap / len(relevant) if relevant else 0.0
+
+    rr = 0.0
+    for i, pred in enumerate(retrieved):
+        if (pred["law_code"], pred["law_number"]) in relevant_set:
+            rr = 1 / (i + 1)
+            break
+
+    dcg = 0.0
+    idcg = sum([1 / np.log2(i + 2) for i in range(min(k, len(relevant)))])
+    for i, pred in enumerate(top_k):
+        if (pred["law_code"], pred["law_number"]) in relevant_set:
+            dcg += 1 / np.log2(i + 2)
+    ndcg = dcg / idcg if idcg > 0 else 0.0
+
+    hit1 = bool(retrieved) and (retrieved[0]["law_code"], retrieved[0]["law_number"]) in relevant_set
+    return hit1, bool(correct), precision_at_k, map_at_k, rr, ndcg, recall_at_k
+
+
+def summarize(label, served, relevant_articles, k, hit_rate):
+    rows = [compute_metrics(r, rel, k) for r, rel in zip(served, relevant_articles)]
+    hit1, hitk, pk, mapk, mrr, ndcg, recall = (np.mean(col) for col in zip(*rows))
+    return {
+        "threshold": label,
+        "cache_hit_rate": round(hit_rate, 3),
+        "Hit@1": round(hit1, 3),
+        f"Hit@{k}": round(hitk, 3),
+        f"MAP@{k}": round(mapk, 3),
+        "MRR": round(mrr, 3),
+        f"NDCG@{k}": round(ndcg, 3),
+        f"Recall@{k}": round(recall, 3),
+        f"Precision@{k}": round(pk, 3),
+    }
+
+
+async def fetch_all(client, vectors, k):
+    retrieved = []
+    for vector in vectors:
+        res = await search_with_precomputed_vectors(
+            client=client,
+            collection_name=COLLECTION_NAME,
+            top_k=k,
+            retriever_type="dense",
+            dense_vector=vector.tolist(),
+        )
+        docs = []
+        for r in res.points:
+            meta = (r.payload or {}).get("metadata", {})
+            if meta.get("law_code") and meta.get("law_number"):
+                docs.append({"law_code": meta["law_code"], "law_number": meta["law_number"]})
+        retrieved.append(docs)
+    return retrieved
+
+
+async def main(k, capacity):
+    with open(EVAL_PATH, "rb") as f:
+        eval_dset = pickle.load(f)
+
+    vectors = np.asarray(eval_dset["BAAI/bge-m3"], dtype=np.float32)
+    relevant_articles = eval_dset["relevant_articles"]
+
+    client = get_qdrant_client()
+    retrieved = await fetch_all(client, vectors, k)
+
+    results = [summarize("no cache", retrieved, relevant_articles, k, 0.0)]
+
+    # Replay the questions in order; a hit serves the documents retrieved for
+    # the earlier, similar question instead of the question's own results
+    for threshold in THRESHOLDS:
+        cache = SemanticCache(capacity=capacity, threshold=threshold)
+        served = []
+        for vector, docs in zip(vectors, retrieved):
+            cached = cache.lookup("laws", COLLECTION_NAME, vector)
+            if cached is None:
+                cache.add("laws", COLLECTION_NAME, vector, docs)
+                cached = docs
+            served.append(cached)
+
+        stats = cache.stats()
+        logger.info(f"threshold={threshold}: {stats}")
+        results.append(
+            summarize(threshold, served, relevant_articles, k, stats["hit_rate"])
+        )
+
+    df = pd.DataFrame(results)
+    df.to_csv(OUTPUT_PATH, index=False)
+    print(df.to_string(index=False))
+    logger.info(f"Saved semantic cache evaluation to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure semantic cache quality impact.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--capacity", type=int, default=512)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.k, args.capacity))
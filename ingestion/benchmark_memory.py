@@ -0,0 +1,147 @@
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import numpy as np
+import pandas as pd
+import psutil
+from fastembed import SparseTextEmbedding
+
+from retrieval import load_config
+from ingestion.load_to_qdrant import ChunkIds, SourceSet, build_batch, config_sources
+from logger import get_logger
+
+logger = get_logger()
+
+OUTPUT_PATH = "eval_results/ingestion_memory_benchmark.csv"
+MODES = ["in_memory", "streaming"]
+
+
+class PeakRSS:
+    # Samples the resident set size of the current process in a background thread
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = self.process.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+def prepare_in_memory(config, batch_size):
+    # Previous loader: whole vector matrix, payload list and sparse vectors in RAM
+    sources = config_sources(config)
+    dense_vectors = np.concatenate([np.load(s["vectors_path"]) for s in sources])
+    flat_payloads = []
+    for source in sources:
+        with open(source["metadata_path"], "r", encoding="utf-8") as f:
+            flat_payloads.extend(json.load(f))
+    sparse_model = SparseTextEmbedding(model_name="Qdrant/bm25")
+    sparse_vectors = list(sparse_model.embed([p["text"] for p in flat_payloads]))
+    chunk_ids = ChunkIds(config["collection_name"])
+    ids = [chunk_ids(i, p) for i, p in enumerate(flat_payloads)]
+
+    for start in range(0, len(dense_vectors), batch_size):
+        end = start + batch_size
+        build_batch(
+            ids[start:end],
+            dense_vectors[start:end],
+            sparse_vectors[start:end],
+            flat_payloads[start:end],
+        )
+    return len(dense_vectors)
+
+
+def prepare_streaming(config, batch_size):
+    # Current loader: memory-mapped vectors, streamed payloads and sparse vectors
+    sources = SourceSet(config_sources(config))
+    sparse_model = SparseTextEmbedding(model_name="Qdrant/bm25")
+    chunk_ids = ChunkIds(config["collection_name"])
+
+    batch_ids = []
+    batch_payloads = []
+    start = 0
+
+    def flush():
+        batch_sparse = list(
+            sparse_model.embed([p["text"] for p in batch_payloads], batch_size=batch_size)
+        )
+        end = start + len(batch_payloads)
+        build_batch(batch_ids, sources.dense(start, end), batch_sparse, batch_payloads)
+
+    for row, flat_payload in sources.rows():
+        batch_ids.append(chunk_ids(row, flat_payload))
+        batch_payloads.append(flat_payload)
+        if len(batch_payloads) == batch_size:
+            flush()
+            start += batch_size
+            batch_ids, batch_payloads = [], []
+    if batch_payloads:
+        flush()
+    return sources.total
+
+
+def measure(config_name, mode, batch_size):
+    config = load_config(config_name)
+    prepare = prepare_in_memory if mode == "in_memory" else prepare_streaming
+    start = time.perf_counter()
+    with PeakRSS() as rss:
+        total = prepare(config, batch_size)
+    return {
+        "mode": mode,
+        "points": total,
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def main(config_name, batch_size):
+    # Each mode runs in a fresh interpreter so peaks don't carry over
+    results = []
+    for mode in MODES:
+        logger.info(f"Measuring {mode} ingestion for {config_name}...")
+        output = subprocess.run(
+            [sys.executable, "-m", "ingestion.benchmark_memory", config_name,
+             "--batch-size", str(batch_size), "--mode", mode],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+        logger.info(f"{mode}: {results[-1]}")
+
+    df = pd.DataFrame(results)
+    df.to_csv(OUTPUT_PATH, index=False)
+    print(df.to_string(index=False))
+    logger.info(f"Saved benchmark to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare peak memory of in-memory and streaming ingestion (no upload)."
+    )
+    parser.add_argument("config_name", nargs="?", default="cases_bge")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.config_name, args.mode, args.batch_size)))
+    else:
+        main(args.config_name, args.batch_size)
@@ -1,114 +1,781 @@
 import os
 import uuid
 import json
+import bisect
+import hashlib
 import time
+import asyncio
 import numpy as np
 import argparse
-from qdrant_client import QdrantClient
+from datetime import datetime
+from collections import Counter, deque
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.models import (
     VectorParams,
     SparseVectorParams,
     SparseVector,
-    PointStruct,
+    Batch,
     Distance,
     SparseIndexParams,
+    CollectionStatus,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    PointIdsList,
+    HnswConfigDiff,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    PayloadSchemaType,
 )
 from fastembed import SparseTextEmbedding
-from retrieval import load_config
+from retrieval import load_config, invalidate_collection_cache
+from retrieval.tools import LAW_CODE_FIELD, CASE_CODE_FIELD, CASE_TYPE_FIELD, DATE_FIELD
+from retrieval.text_store import TextStoreWriter, text_store_path
+from ingestion.streaming import iter_payloads
 from logger import get_logger
 
 logger = get_logger()
 
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+CHECKPOINT_DIR = os.path.join("data", "checkpoints")
+# Physical collections are named "<alias>--v<epoch ms>"; the bot only ever
+# queries the alias, which is repointed once a new version is fully loaded
+VERSION_SEPARATOR = "--v"
+# Indexed for filtered retrieval (retrieval.tools.build_filter); fields a
+# collection doesn't have simply stay empty
+PAYLOAD_INDEXES = {
+    LAW_CODE_FIELD: PayloadSchemaType.KEYWORD,
+    CASE_CODE_FIELD: PayloadSchemaType.KEYWORD,
+    CASE_TYPE_FIELD: PayloadSchemaType.KEYWORD,
+    DATE_FIELD: PayloadSchemaType.DATETIME,
+}
 
 
-def main(config):
-    start_time = time.time()
+def point_id(collection_name, key):
+    # Stable ids make re-sent batches overwrite instead of duplicating points.
+    # Derived from the alias, so they survive rebuilds and keep score caches warm
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{collection_name}:{key}"))
+
+
+def chunk_key(flat_payload):
+    # Source document of a chunk: a law article or a court decision
+    if flat_payload.get("law_code") is not None:
+        return f"law:{flat_payload['law_code']}:{flat_payload.get('law_number')}"
+    meta = flat_payload.get("metadata")
+    case_url = flat_payload.get("case_url")
+    if case_url is None and isinstance(meta, dict):
+        case_url = meta.get("case_url")
+    if case_url:
+        return f"case:{case_url}"
+    return None
+
+
+class ChunkIds:
+    # Assigns point ids from (source document, chunk number) in file order, so
+    # a chunk keeps its id when unrelated documents are added or removed
+
+    def __init__(self, collection_name):
+        self.collection_name = collection_name
+        self._chunks = Counter()
+
+    def __call__(self, row, flat_payload):
+        key = chunk_key(flat_payload) or f"row:{row}"
+        chunk = self._chunks[key]
+        self._chunks[key] += 1
+        return point_id(self.collection_name, f"{key}:{chunk}")
+
+
+def content_hash(payload):
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def payload_date(flat_payload):
+    # Case dates are stored as dd.mm.YYYY; the datetime index needs ISO dates
+    meta = flat_payload.get("metadata")
+    raw = flat_payload.get("case_date")
+    if raw is None and isinstance(meta, dict):
+        raw = meta.get("case_date")
     try:
-        # Load config
-        collection_name = config["collection_name"]
-        vector_file = config["vectors_path"]
-        metadata_file = config["metadata_path"]
-        vector_size = config["vector_dim"]
-
-        logger.info(f"Loading collection config: {collection_name}")
-        dense_vectors = np.load(vector_file)
-        with open(metadata_file, "r", encoding="utf-8") as f:
-            flat_payloads = json.load(f)
-
-        assert len(dense_vectors) == len(
-            flat_payloads
-        ), "Mismatch between vectors and payloads"
-
-        # Connect to Qdrant
-        client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
-
-        # Recreate collection
-        if client.collection_exists(collection_name):
-            logger.info(f"Deleting existing collection '{collection_name}'")
-            client.delete_collection(collection_name)
-
-        logger.info(f"Creating hybrid collection '{collection_name}'...")
-        client.create_collection(
+        return datetime.strptime(raw, "%d.%m.%Y").date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def wrap_payload(flat_payload):
+    payload = {
+        "text": flat_payload["text"],
+        "metadata": {k: v for k, v in flat_payload.items() if k != "text"},
+    }
+    date = payload_date(flat_payload)
+    if date:
+        payload[DATE_FIELD] = date
+    # Hash of everything stored, so derived fields added later also count as changes
+    payload["content_hash"] = content_hash(payload)
+    return payload
+
+
+def versioned_name(alias):
+    return f"{alias}{VERSION_SEPARATOR}{int(time.time() * 1000)}"
+
+
+def checkpoint_path(collection_name):
+    return os.path.join(CHECKPOINT_DIR, f"{collection_name}.json")
+
+
+def load_checkpoint(collection_name, total, batch_size):
+    path = checkpoint_path(collection_name)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("total") != total or checkpoint.get("batch_size") != batch_size:
+        logger.warning(f"Ignoring checkpoint {path}: data or batch size changed")
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint):
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    path = checkpoint_path(checkpoint["collection"])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def quantization_config(quantization=None):
+    quantization = quantization or {}
+    kind = quantization.get("type", "none")
+    if kind == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=quantization.get("quantile", 0.99),
+                always_ram=quantization.get("always_ram", True),
+            )
+        )
+    if kind == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(
+                always_ram=quantization.get("always_ram", True)
+            )
+        )
+    if kind != "none":
+        raise ValueError(f"Unknown quantization type: {kind}")
+    return None
+
+
+def dense_vector_params(vector_size, storage=None):
+    # `storage` block of a retriever config; omitted keys keep Qdrant defaults
+    storage = storage or {}
+    hnsw = storage.get("hnsw")
+    return VectorParams(
+        size=vector_size,
+        distance=Distance.COSINE,
+        on_disk=storage.get("on_disk"),
+        hnsw_config=HnswConfigDiff(**hnsw) if hnsw else None,
+        quantization_config=quantization_config(storage.get("quantization")),
+    )
+
+
+async def create_collection(client, collection_name, vector_size, storage=None):
+    if await client.collection_exists(collection_name):
+        logger.info(f"Deleting existing collection '{collection_name}'")
+        await client.delete_collection(collection_name)
+
+    storage = storage or {}
+    logger.info(f"Creating hybrid collection '{collection_name}' (storage: {storage})...")
+    await client.create_collection(
+        collection_name=collection_name,
+        vectors_config={"dense": dense_vector_params(vector_size, storage)},
+        sparse_vectors_config={
+            "sparse": SparseVectorParams(
+                index=SparseIndexParams(on_disk=storage.get("sparse_on_disk", False))
+            )
+        },
+    )
+    await create_payload_indexes(client, collection_name)
+
+
+async def create_payload_indexes(client, collection_name):
+    # Idempotent: existing indexes are left as they are
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        await client.create_payload_index(
             collection_name=collection_name,
-            vectors_config={
-                "dense": VectorParams(size=vector_size, distance=Distance.COSINE)
-            },
-            sparse_vectors_config={
-                "sparse": SparseVectorParams(index=SparseIndexParams(on_disk=False))
-            },
+            field_name=field_name,
+            field_schema=field_schema,
+            wait=True,
         )
 
-        # client.create_payload_index(
-        #     collection_name=collection_name, field_name="text", field_schema="text"
-        # )
-
-        # Sparse encoder
-        logger.info("Initializing sparse embedder (BM25)...")
-        sparse_model = SparseTextEmbedding(model_name="Qdrant/bm25")
-        texts = [p["text"] for p in flat_payloads]
-        sparse_vectors = list(sparse_model.embed(texts))
-
-        # Upload points
-        logger.info("Uploading vectors...")
-        batch_size = 256
-        for i in range(0, len(dense_vectors), batch_size):
-            batch_dense = dense_vectors[i : i + batch_size]
-            batch_sparse = sparse_vectors[i : i + batch_size]
-            batch_payloads = flat_payloads[i : i + batch_size]
-            batch_ids = [str(uuid.uuid4()) for _ in range(len(batch_dense))]
-
-            points = []
-            for pid, vec, sparse_vec, flat_payload in zip(
-                batch_ids, batch_dense, batch_sparse, batch_payloads
-            ):
-                wrapped_payload = {
-                    "text": flat_payload["text"],
-                    "metadata": {k: v for k, v in flat_payload.items() if k != "text"},
-                }
-
-                points.append(
-                    PointStruct(
-                        id=pid,
-                        vector={
-                            "dense": vec.tolist(),
-                            "sparse": SparseVector(
-                                indices=sparse_vec.indices.tolist(),
-                                values=sparse_vec.values.tolist(),
-                            ),
-                        },
-                        payload=wrapped_payload,
-                    )
+
+async def alias_target(client, alias):
+    for collection_alias in (await client.get_aliases()).aliases:
+        if collection_alias.alias_name == alias:
+            return collection_alias.collection_name
+    return None
+
+
+async def list_versions(client, alias):
+    collections = (await client.get_collections()).collections
+    return sorted(
+        c.name for c in collections if c.name.startswith(alias + VERSION_SEPARATOR)
+    )
+
+
+async def drop_versions(client, alias, keep):
+    for name in await list_versions(client, alias):
+        if name not in keep:
+            logger.info(f"Deleting retired collection '{name}'")
+            await client.delete_collection(name)
+
+
+async def wait_until_ready(client, collection_name, timeout=600, poll_interval=2.0):
+    # Don't route traffic to a collection that is still building its indexes
+    deadline = time.monotonic() + timeout
+    while True:
+        info = await client.get_collection(collection_name)
+        if info.status == CollectionStatus.GREEN:
+            return
+        if time.monotonic() > deadline:
+            logger.warning(
+                f"'{collection_name}' still {info.status} after {timeout}s, swapping anyway"
+            )
+            return
+        await asyncio.sleep(poll_interval)
+
+
+async def swap_alias(client, alias, target, retries=3, backoff=1.0):
+    previous = await alias_target(client, alias)
+    collections = {c.name for c in (await client.get_collections()).collections}
+    legacy = alias in collections
+    if legacy:
+        # One-time migration from a plain collection to an alias of the same
+        # name. Qdrant rejects an alias that shadows a collection, so the
+        # legacy collection has to go first: searches fail from here until
+        # the alias below exists. The target is already loaded and indexed,
+        # which keeps that gap to two back-to-back requests.
+        logger.warning(
+            f"Replacing legacy collection '{alias}' with an alias; "
+            "searches fail until the alias is created"
+        )
+        await client.delete_collection(alias)
+
+    operations = []
+    if previous:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(
+        CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=target, alias_name=alias)
+        )
+    )
+    # Both operations are applied atomically, so searches never see a missing alias
+    for attempt in range(retries):
+        try:
+            await client.update_collection_aliases(change_aliases_operations=operations)
+            break
+        except Exception as e:
+            # After a legacy delete a failure here would leave nothing to search
+            if not legacy or attempt == retries - 1:
+                raise
+            logger.warning(f"Creating alias '{alias}' failed (attempt {attempt + 1}): {e}")
+            await asyncio.sleep(backoff * (attempt + 1))
+    logger.info(f"Alias '{alias}' now points to '{target}' (was '{previous}')")
+    return previous
+
+
+def build_batch(batch_ids, batch_dense, batch_sparse, batch_payloads, with_text=True):
+    # Column-oriented batch instead of a PointStruct per point. Qdrant's models
+    # only hold Python lists (pydantic converts a numpy array element by
+    # element), so the dense block is converted once here with tolist(); only
+    # the batches in flight are ever held as Python floats
+    payloads = [wrap_payload(flat_payload) for flat_payload in batch_payloads]
+    if not with_text:
+        # Texts live in the local text store; the hash still covers them
+        for payload in payloads:
+            del payload["text"]
+    return Batch(
+        ids=batch_ids,
+        vectors={
+            "dense": np.asarray(batch_dense, dtype=np.float32).tolist(),
+            "sparse": [
+                SparseVector(
+                    indices=sparse_vec.indices.tolist(),
+                    values=sparse_vec.values.tolist(),
                 )
+                for sparse_vec in batch_sparse
+            ],
+        },
+        payloads=payloads,
+    )
+
+
+async def upsert_with_retry(client, collection_name, batch, retries=3, backoff=2.0):
+    for attempt in range(retries):
+        try:
+            await client.upsert(collection_name=collection_name, points=batch, wait=True)
+            return
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            logger.warning(f"Upsert failed (attempt {attempt + 1}): {e}")
+            await asyncio.sleep(backoff * (attempt + 1))
+
+
+def text_store_writer(config):
+    # `text_store: true` keeps chunk texts in a local memory-mapped store
+    # (retrieval.text_store) instead of the Qdrant payload
+    if not config.get("text_store"):
+        return None
+    return TextStoreWriter(text_store_path(config["collection_name"]))
+
+
+def config_sources(config, names=None):
+    # A config either lists several `sources` that share one collection
+    # (e.g. codes and federal laws) or has a single vectors/metadata pair
+    sources = config.get("sources") or [
+        {
+            "name": "default",
+            "vectors_path": config["vectors_path"],
+            "metadata_path": config["metadata_path"],
+        }
+    ]
+    if names:
+        unknown = set(names) - {source["name"] for source in sources}
+        if unknown:
+            raise ValueError(f"Unknown sources: {sorted(unknown)}")
+        sources = [source for source in sources if source["name"] in names]
+    return sources
+
+
+class SourceSet:
+    # Memory-mapped vectors of several sources addressed as one row range;
+    # vectors stay on disk and are paged in batch by batch
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.vectors = [np.load(s["vectors_path"], mmap_mode="r") for s in sources]
+        self.offsets = [0]
+        for vectors in self.vectors:
+            self.offsets.append(self.offsets[-1] + len(vectors))
+        self.total = self.offsets[-1]
+
+    def dense(self, start, end):
+        parts = []
+        for offset, vectors in zip(self.offsets, self.vectors):
+            lo, hi = max(start, offset), min(end, offset + len(vectors))
+            if lo < hi:
+                parts.append(vectors[lo - offset : hi - offset])
+        return np.concatenate(parts)
+
+    def take(self, rows):
+        picked = []
+        for row in rows:
+            i = bisect.bisect_right(self.offsets, row) - 1
+            picked.append(self.vectors[i][row - self.offsets[i]])
+        return np.stack(picked)
+
+    def rows(self):
+        # Streams (row key, flat payload) for every source in order
+        for source, vectors in zip(self.sources, self.vectors):
+            mismatch = ValueError(
+                f"Mismatch between vectors and payloads in source '{source['name']}'"
+            )
+            count = 0
+            for flat_payload in iter_payloads(source["metadata_path"]):
+                if count == len(vectors):
+                    raise mismatch
+                yield f"{source['name']}:{count}", flat_payload
+                count += 1
+            if count != len(vectors):
+                raise mismatch
+
+
+async def upload_rows(
+    client,
+    target,
+    collection_name,
+    sources,
+    batch_size=256,
+    max_in_flight=4,
+    sparse_workers=None,
+    acked=frozenset(),
+    on_ack=None,
+    text_store=None,
+    rows=None,
+    with_text=None,
+):
+    # Streams all rows of `sources` into `target`, skipping batches in `acked`.
+    # Sparse encoding and batch assembly overlap with up to max_in_flight upserts.
+    # Texts of all rows, acked or not, go to `text_store` when one is given.
+    # `rows` restricts the upload to these sorted row indices (diff sync);
+    # ids are still assigned over all rows.
+    if with_text is None:
+        with_text = text_store is None
+    selected = None if rows is None else set(rows)
+    total = sources.total if rows is None else len(rows)
+    num_batches = (total + batch_size - 1) // batch_size
+    todo = [b for b in range(num_batches) if b not in acked]
+    if not todo:
+        logger.info("Nothing left to upload.")
+        return 0
+
+    # Sparse encoder: fastembed fans batches out to worker processes and
+    # yields embeddings in input order, so it can be consumed batch by batch
+    logger.info(f"Initializing sparse embedder (BM25) with {sparse_workers or 1} workers...")
+    sparse_model = SparseTextEmbedding(model_name="Qdrant/bm25")
+    chunk_ids = ChunkIds(collection_name)
+    # (id, payload) pairs read by the text generator but not yet packed into a batch
+    read_payloads = deque()
+
+    def texts():
+        position = 0
+        for index, (row, flat_payload) in enumerate(sources.rows()):
+            # Ids depend on earlier rows, so they are assigned for skipped rows too
+            pid = chunk_ids(row, flat_payload)
+            if text_store is not None:
+                text_store.put(pid, flat_payload["text"])
+            if selected is not None and index not in selected:
+                continue
+            b = position // batch_size
+            position += 1
+            if b in acked:
+                continue
+            read_payloads.append((pid, flat_payload))
+            yield flat_payload["text"]
+
+    sparse_stream = sparse_model.embed(texts(), batch_size=batch_size, parallel=sparse_workers)
+
+    def next_batch(b):
+        start = b * batch_size
+        end = min(start + batch_size, total)
+        batch_ids = []
+        batch_sparse = []
+        batch_payloads = []
+        for _ in range(end - start):
+            sparse_vec = next(sparse_stream, None)
+            if sparse_vec is None:
+                raise ValueError("Mismatch between vectors and payloads")
+            pid, flat_payload = read_payloads.popleft()
+            batch_ids.append(pid)
+            batch_sparse.append(sparse_vec)
+            batch_payloads.append(flat_payload)
+        dense = sources.dense(start, end) if rows is None else sources.take(rows[start:end])
+        return build_batch(batch_ids, dense, batch_sparse, batch_payloads, with_text=with_text)
+
+    loop = asyncio.get_running_loop()
+    in_flight = asyncio.Semaphore(max_in_flight)
+    uploaded = 0
+
+    async def upload(b, batch):
+        nonlocal uploaded
+        try:
+            await upsert_with_retry(client, target, batch)
+            if on_ack is not None:
+                on_ack(b)
+            uploaded += len(batch.ids)
+            logger.info(f"Uploaded batch {b + 1}/{num_batches} ({len(batch.ids)} points)")
+        finally:
+            in_flight.release()
 
-            client.upsert(collection_name=collection_name, points=points)
-            logger.info(f"Uploaded batch {i}-{i + len(points) - 1}")
+    logger.info(f"Uploading {len(todo)} batches with up to {max_in_flight} in flight...")
+    tasks = []
+    for b in todo:
+        # Encoding runs in a worker thread while earlier batches are uploading
+        batch = await loop.run_in_executor(None, next_batch, b)
+        await in_flight.acquire()
+        tasks.append(asyncio.create_task(upload(b, batch)))
+        # Surface upload failures early instead of encoding the whole corpus
+        for task in [t for t in tasks if t.done()]:
+            task.result()
+            tasks.remove(task)
+    await asyncio.gather(*tasks)
 
-        elapsed = time.time() - start_time
-        logger.info(f"Upload complete: {len(dense_vectors)} vectors stored.")
-        logger.info(f"Total time: {elapsed:.2f} seconds")
+    # Drains the stream so the per-source count checks run to the end
+    if read_payloads or next(sparse_stream, None) is not None:
+        raise ValueError("Mismatch between vectors and payloads")
+    return uploaded
 
+
+async def load_collection(
+    config,
+    batch_size=256,
+    max_in_flight=4,
+    sparse_workers=None,
+    resume=True,
+    grace_seconds=60,
+):
+    start_time = time.time()
+
+    collection_name = config["collection_name"]
+    vector_size = config["vector_dim"]
+
+    logger.info(f"Loading collection config: {collection_name}")
+    # Payloads are streamed and vectors memory-mapped, so peak memory does
+    # not grow with the corpus
+    sources = SourceSet(config_sources(config))
+    total = sources.total
+    num_batches = (total + batch_size - 1) // batch_size
+
+    client = AsyncQdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+
+    checkpoint = load_checkpoint(collection_name, total, batch_size) if resume else None
+    if checkpoint and await client.collection_exists(checkpoint.get("target", "")):
+        target = checkpoint["target"]
+        logger.info(
+            f"Resuming '{target}': {len(checkpoint['acked'])}/{num_batches} batches already uploaded"
+        )
+    else:
+        target = versioned_name(collection_name)
+        await create_collection(client, target, vector_size, config.get("storage"))
+        checkpoint = {
+            "collection": collection_name,
+            "target": target,
+            "total": total,
+            "batch_size": batch_size,
+            "acked": [],
+        }
+        save_checkpoint(checkpoint)
+
+    # Versions left behind by interrupted runs are neither live nor resumable
+    await drop_versions(
+        client, collection_name, keep={target, await alias_target(client, collection_name)}
+    )
+
+    acked = set(checkpoint["acked"])
+    text_store = text_store_writer(config)
+
+    def on_ack(b):
+        acked.add(b)
+        checkpoint["acked"] = sorted(acked)
+        save_checkpoint(checkpoint)
+
+    uploaded = await upload_rows(
+        client,
+        target,
+        collection_name,
+        sources,
+        batch_size=batch_size,
+        max_in_flight=max_in_flight,
+        sparse_workers=sparse_workers,
+        acked=set(acked),
+        on_ack=on_ack,
+        text_store=text_store,
+    )
+
+    await wait_until_ready(client, target)
+    if text_store is not None:
+        # Committed before the swap for the same reason as in diff_collection;
+        # texts only the old version has are kept until it is dropped
+        text_store.commit()
+    previous = await swap_alias(client, collection_name, target)
+    # Cached answers were computed against the old collection contents
+    invalidate_collection_cache(collection_name)
+    os.remove(checkpoint_path(collection_name))
+
+    if previous:
+        # Requests that resolved the alias just before the swap may still be
+        # reading the old version
+        logger.info(f"Keeping '{previous}' for {grace_seconds}s before deleting it")
+        await asyncio.sleep(grace_seconds)
+    await drop_versions(client, collection_name, keep={target})
+    if text_store is not None:
+        text_store.commit(prune=True)
+        text_store.close()
+    await client.close()
+
+    elapsed = time.time() - start_time
+    logger.info(f"Upload complete: {total} vectors stored ({uploaded} uploaded in this run).")
+    logger.info(
+        f"Total time: {elapsed:.2f} seconds ({uploaded / max(elapsed, 1e-9):.1f} points/sec)"
+    )
+
+
+async def append_sources(
+    config, source_names=None, batch_size=256, max_in_flight=4, sparse_workers=None
+):
+    # Upserts the selected sources into the live collection without touching
+    # other points; deterministic ids make re-running it idempotent
+    start_time = time.time()
+
+    collection_name = config["collection_name"]
+    sources = SourceSet(config_sources(config, source_names))
+    names = [source["name"] for source in sources.sources]
+
+    client = AsyncQdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    if not await client.collection_exists(collection_name):
+        raise ValueError(f"'{collection_name}' does not exist, run a full load first")
+
+    await create_payload_indexes(client, collection_name)
+    logger.info(f"Appending sources {names} ({sources.total} chunks) to '{collection_name}'")
+    text_store = text_store_writer(config)
+    uploaded = await upload_rows(
+        client,
+        collection_name,
+        collection_name,
+        sources,
+        batch_size=batch_size,
+        max_in_flight=max_in_flight,
+        sparse_workers=sparse_workers,
+        text_store=text_store,
+    )
+    if text_store is not None:
+        text_store.commit()
+        text_store.close()
+    invalidate_collection_cache(collection_name)
+    await client.close()
+
+    elapsed = time.time() - start_time
+    logger.info(
+        f"Append complete: {uploaded} points in {elapsed:.2f} seconds "
+        f"({uploaded / max(elapsed, 1e-9):.1f} points/sec)"
+    )
+
+
+async def fetch_content_hashes(client, collection_name, page_size=2048):
+    hashes = {}
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=["content_hash"],
+            with_vectors=False,
+        )
+        for point in points:
+            hashes[str(point.id)] = (point.payload or {}).get("content_hash")
+        if offset is None:
+            return hashes
+
+
+async def diff_collection(config, batch_size=256, max_in_flight=4, sparse_workers=None):
+    # Upserts only chunks whose content hash changed and deletes chunks that
+    # disappeared from the source files, directly in the live collection
+    start_time = time.time()
+
+    collection_name = config["collection_name"]
+    # All sources are always compared: anything missing from them is deleted
+    sources = SourceSet(config_sources(config))
+    total = sources.total
+
+    client = AsyncQdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    if not await client.collection_exists(collection_name):
+        raise ValueError(f"'{collection_name}' does not exist, run a full load first")
+
+    await create_payload_indexes(client, collection_name)
+    logger.info(f"Fetching content hashes from '{collection_name}'...")
+    existing = await fetch_content_hashes(client, collection_name)
+
+    # First pass only keeps row indices; changed payloads are read again
+    # batch by batch by upload_rows below
+    chunk_ids = ChunkIds(collection_name)
+    text_store = text_store_writer(config)
+    changed = []
+    seen = set()
+    for index, (row, flat_payload) in enumerate(sources.rows()):
+        pid = chunk_ids(row, flat_payload)
+        seen.add(pid)
+        if text_store is not None:
+            # Unchanged texts are only compared, not rewritten
+            text_store.put(pid, flat_payload["text"])
+        if existing.get(pid) != wrap_payload(flat_payload)["content_hash"]:
+            changed.append(index)
+
+    vanished = [pid for pid in existing if pid not in seen]
+    logger.info(
+        f"{len(changed)} chunks new or changed, {len(vanished)} removed, "
+        f"{total - len(changed)} unchanged"
+    )
+
+    if text_store is not None:
+        # Texts go live before the new hashes, so a rerank score cached under
+        # a new content hash is never computed from the old text. Removed
+        # chunks keep theirs until the points are deleted below.
+        text_store.commit()
+
+    if changed:
+        # The store was filled above, so it is not passed again
+        await upload_rows(
+            client,
+            collection_name,
+            collection_name,
+            sources,
+            batch_size=batch_size,
+            max_in_flight=max_in_flight,
+            sparse_workers=sparse_workers,
+            rows=changed,
+            with_text=text_store is None,
+        )
+
+    for start in range(0, len(vanished), batch_size):
+        await client.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=vanished[start : start + batch_size]),
+            wait=True,
+        )
+
+    if text_store is not None:
+        text_store.commit(prune=True)
+        text_store.close()
+    if changed or vanished:
+        invalidate_collection_cache(collection_name)
+    await client.close()
+
+    elapsed = time.time() - start_time
+    logger.info(f"Diff sync of '{collection_name}' finished in {elapsed:.2f} seconds")
+
+
+
+
+def main(
+    config,
+    batch_size=256,
+    max_in_flight=4,
+    sparse_workers=None,
+    resume=True,
+    grace_seconds=60,
+    diff=False,
+    append=False,
+    source_names=None,
+):
+    try:
+        if append:
+            asyncio.run(
+                append_sources(
+                    config,
+                    source_names=source_names,
+                    batch_size=batch_size,
+                    max_in_flight=max_in_flight,
+                    sparse_workers=sparse_workers,
+                )
+            )
+            return
+        if diff:
+            asyncio.run(
+                diff_collection(
+                    config,
+                    batch_size=batch_size,
+                    max_in_flight=max_in_flight,
+                    sparse_workers=sparse_workers,
+                )
+            )
+            return
+        asyncio.run(
+            load_collection(
+                config,
+                batch_size=batch_size,
+                max_in_flight=max_in_flight,
+                sparse_workers=sparse_workers,
+                resume=resume,
+                grace_seconds=grace_seconds,
+            )
+        )
     except Exception as e:
         logger.exception("Something went wrong during vector upload.")
 
@@ -118,8 +785,57 @@ if __name__ == "__main__":
     parser.add_argument(
         "config_name", type=str, help="Name of the config file (without .yaml)"
     )
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument(
+        "--in-flight", type=int, default=4, help="Concurrent upsert requests"
+    )
+    parser.add_argument(
+        "--sparse-workers",
+        type=int,
+        default=None,
+        help="Worker processes for BM25 encoding (default: encode in-process)",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Ignore any checkpoint and rebuild the collection from scratch",
+    )
+    parser.add_argument(
+        "--grace-seconds",
+        type=int,
+        default=60,
+        help="How long the previous collection version is kept after the alias swap",
+    )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="Only upsert changed chunks and delete removed ones in the live collection",
+    )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Upsert sources into the live collection without rebuilding or deleting",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        dest="sources",
+        help="Source name from the config's `sources` list to append (repeatable)",
+    )
     args = parser.parse_args()
+    if args.sources and not args.append:
+        parser.error("--source can only be used with --append")
 
     logger.info(f"Script started with config: {args.config_name}")
     config = load_config(args.config_name)
-    main(config)
+    main(
+        config,
+        batch_size=args.batch_size,
+        max_in_flight=args.in_flight,
+        sparse_workers=args.sparse_workers,
+        resume=not args.fresh,
+        grace_seconds=args.grace_seconds,
+        diff=args.diff,
+        append=args.append,
+        source_names=args.sources,
+    )
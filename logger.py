@@ -1,5 +1,6 @@
 import logging
 import os
+import re
 import sys
 import atexit
 import time
@@ -9,7 +10,11 @@ import functools
 import inspect
 
 # Get the script name for file and folder
-main_script = Path(sys.argv[0]).stem or "script"
+main_script = Path(sys.argv[0]).stem
+# Scripts piped through stdin ("-") or run with -c have no usable name
+if not main_script or main_script.startswith("-"):
+    main_script = "script"
+main_script = re.sub(r"[^\w-]+", "_", main_script)
 LOG_DIR = os.path.join("logs", main_script)
 os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -1,20 +1,19 @@
-import requests
 import json
 import os
 import time
 import random
-import urllib3
+import asyncio
+import argparse
 from bs4 import BeautifulSoup
 from logger import get_logger, auto_logger
 from parsing_cases.utils import resolve_output_path
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from parsing_laws.http_cache import get_http_cache
+from parsing_laws.crawler import Crawler
 
 logger = get_logger("case_text_collector")
 
-INPUT_PATH = resolve_output_path("data\cases_data\case_links_deduped.json")
+INPUT_PATH = resolve_output_path("data/cases_data/case_links_deduped.json")
 OUTPUT_PATH = resolve_output_path("data/cases_data/case_texts.jsonl")
-FAILED_PATH = resolve_output_path("data/cases_data/case_texts_failed.json")
 
 USER_AGENTS = [
     # Chrome (Windows)
@@ -57,27 +56,6 @@ USER_AGENTS = [
 ]
 
 
-session = requests.Session()
-
-
-@auto_logger
-def get_soup(url, retries=3, backoff=1.5, logger=None):
-    for attempt in range(retries):
-        headers = {"User-Agent": random.choice(USER_AGENTS)}
-        try:
-            res = session.get(url, headers=headers, timeout=10, verify=False)
-            if res.status_code == 429 or 500 <= res.status_code < 600:
-                logger.warning(f"Retry {attempt+1}: {url} => {res.status_code}")
-                time.sleep(backoff * (attempt + 1))
-                continue
-            res.raise_for_status()
-            return BeautifulSoup(res.text, "lxml")
-        except Exception as e:
-            logger.warning(f"Request failed ({url}) => {e}")
-            time.sleep(backoff * (attempt + 1))
-    return None
-
-
 @auto_logger
 def extract_raw_text(soup, logger=None):
     td = soup.select_one("td.h-col1.h-col1-inner3")
@@ -86,12 +64,30 @@ def extract_raw_text(soup, logger=None):
     return str(td) if td else None
 
 
+def done_index_path(output_path=OUTPUT_PATH):
+    return output_path + ".done"
+
+
+def failed_path(output_path=OUTPUT_PATH):
+    # case_texts.jsonl -> case_texts_failed.json
+    return os.path.splitext(output_path)[0] + "_failed.json"
+
+
 @auto_logger
-def load_completed_urls(logger=None):
-    if not os.path.exists(OUTPUT_PATH):
+def load_completed_urls(output_path=OUTPUT_PATH, logger=None):
+    # The sidecar index holds one finished URL per line, so resuming doesn't
+    # re-parse the whole JSONL; it is rebuilt from the output once if missing
+    index_path = done_index_path(output_path)
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as f:
+            completed = {line.rstrip("\n") for line in f if line.strip()}
+        logger.info(f"Loaded {len(completed)} completed case URLs from {index_path}.")
+        return completed
+    if not os.path.exists(output_path):
         return set()
+
     completed = set()
-    with open(OUTPUT_PATH, encoding="utf-8") as f:
+    with open(output_path, encoding="utf-8") as f:
         for line in f:
             try:
                 obj = json.loads(line)
@@ -99,57 +95,173 @@ def load_completed_urls(logger=None):
             except Exception as e:
                 logger.debug(f"Skipping corrupt line in output: {e}")
                 continue
-    logger.info(f"Loaded {len(completed)} completed case URLs.")
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.writelines(url + "\n" for url in completed)
+    logger.info(f"Loaded {len(completed)} completed case URLs, index written to {index_path}.")
     return completed
 
 
-@auto_logger
-def main(logger=None):
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+class CollectStats:
+    # Live throughput of the collector, logged every `interval` seconds
 
-    with open(INPUT_PATH, encoding="utf-8") as f:
-        cases = json.load(f)
+    def __init__(self, total, interval=10):
+        self.total = total
+        self.interval = interval
+        self.collected = 0
+        self.failed = 0
+        self.started = time.monotonic()
 
-    completed_urls = load_completed_urls(logger=logger)
-    failed_cases = []
+    def line(self):
+        elapsed = time.monotonic() - self.started
+        rate = self.collected / max(elapsed, 1e-9)
+        left = self.total - self.collected - self.failed
+        eta = left / rate if rate else float("inf")
+        return (
+            f"{self.collected} collected, {self.failed} failed, {left} left "
+            f"({rate:.1f} cases/sec, ETA {eta / 60:.1f} min)"
+        )
 
-    total = len(cases)
-    logger.info(f"Total cases: {total}")
-    logger.info(f"Already collected: {len(completed_urls)}")
+    async def report(self, logger):
+        while True:
+            await asyncio.sleep(self.interval)
+            logger.info(f"Progress: {self.line()}")
 
-    with open(OUTPUT_PATH, "a", encoding="utf-8") as fout:
-        for i, case in enumerate(cases, start=1):
-            url = case["case_url"]
-            if url in completed_urls:
-                continue
 
-            logger.info(f"Fetching [{i}/{total}]: {url}")
-            soup = get_soup(url, logger=logger)
-            if not soup:
-                logger.warning(f"Failed to fetch soup: {url}")
-                failed_cases.append(case)
+async def fetch_case(crawler, case, logger):
+    page = await crawler.get_page(
+        case["case_url"], headers={"User-Agent": random.choice(USER_AGENTS)}
+    )
+    if page is None:
+        logger.warning(f"Failed to fetch soup: {case['case_url']}")
+        return None
+    soup = await asyncio.to_thread(BeautifulSoup, page[0], "lxml")
+    raw_text = extract_raw_text(soup, logger=logger)
+    if not raw_text:
+        logger.warning(f"No raw text found at {case['case_url']}")
+        return None
+    return {**case, "raw_text": raw_text}
+
+
+async def write_records(queue, output_path, stats, flush_every=100, flush_seconds=5):
+    # Single writer: buffered appends to the JSONL, flushed every flush_every
+    # records or flush_seconds. URLs reach the done index only after their
+    # records are fsynced, so a crash never indexes a case missing from the output.
+    with open(output_path, "a", encoding="utf-8", buffering=1 << 20) as fout, open(
+        done_index_path(output_path), "a", encoding="utf-8"
+    ) as fdone:
+        pending = []
+        last_flush = time.monotonic()
+
+        def flush():
+            nonlocal pending, last_flush
+            fout.flush()
+            os.fsync(fout.fileno())
+            fdone.writelines(url + "\n" for url in pending)
+            fdone.flush()
+            pending = []
+            last_flush = time.monotonic()
+
+        while True:
+            timeout = max(0, last_flush + flush_seconds - time.monotonic()) if pending else None
+            try:
+                record = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                flush()
                 continue
+            if record is None:
+                break
+            fout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            pending.append(record["case_url"])
+            stats.collected += 1
+            if len(pending) >= flush_every or time.monotonic() - last_flush >= flush_seconds:
+                flush()
+        if pending:
+            flush()
+
+
+@auto_logger
+async def collect(
+    cases, workers=16, rate_per_host=None, output_path=OUTPUT_PATH, transport=None, logger=None
+):
+    completed_urls = load_completed_urls(output_path, logger=logger)
+    todo = [case for case in cases if case["case_url"] not in completed_urls]
+    todo = list({case["case_url"]: case for case in todo}.values())
+    logger.info(f"Total cases: {len(cases)}")
+    logger.info(f"Already collected: {len(completed_urls)}, to fetch: {len(todo)}")
+
+    stats = CollectStats(len(todo))
+    tasks = asyncio.Queue()
+    for case in todo:
+        tasks.put_nowait(case)
+    # Bounded, so a slow disk applies back-pressure instead of buffering records
+    records = asyncio.Queue(maxsize=workers * 8)
+    failed_cases = []
+
+    options = {"concurrency": workers, "cache": get_http_cache()}
+    if rate_per_host:
+        options["rate_per_host"] = rate_per_host
+    if transport is not None:
+        options["transport"] = transport
 
-            raw_text = extract_raw_text(soup, logger=logger)
-            if not raw_text:
-                logger.warning(f"No raw text found at {url}")
+    async def worker(crawler):
+        while not tasks.empty():
+            case = tasks.get_nowait()
+            try:
+                record = await fetch_case(crawler, case, logger)
+            except Exception as e:
+                logger.warning(f"Failed to collect {case['case_url']}: {e}")
+                record = None
+            if record is None:
                 failed_cases.append(case)
+                stats.failed += 1
                 continue
+            await records.put(record)
 
-            case["raw_text"] = raw_text
-            fout.write(json.dumps(case, ensure_ascii=False) + "\n")
-            fout.flush()
+    async def produce():
+        async with Crawler(**options) as crawler:
+            await asyncio.gather(*[worker(crawler) for _ in range(workers)])
+        await records.put(None)
 
-            completed_urls.add(url)
-            time.sleep(random.uniform(0.3, 0.7))
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    writer = asyncio.create_task(write_records(records, output_path, stats))
+    producer = asyncio.create_task(produce())
+    reporter = asyncio.create_task(stats.report(logger))
+    try:
+        await asyncio.wait({producer, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if writer.done() and not producer.done():
+            # The writer only stops early on an error; workers blocked on the
+            # full queue would otherwise wait forever
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            writer.result()
+        await producer
+        await writer
+    finally:
+        reporter.cancel()
+        if not writer.done():
+            writer.cancel()
 
     if failed_cases:
-        with open(FAILED_PATH, "w", encoding="utf-8") as f:
+        with open(failed_path(output_path), "w", encoding="utf-8") as f:
             json.dump(failed_cases, f, ensure_ascii=False, indent=2)
-        logger.warning(f"Saved {len(failed_cases)} failed cases to: {FAILED_PATH}")
+        logger.warning(
+            f"Saved {len(failed_cases)} failed cases to: {failed_path(output_path)}"
+        )
 
-    logger.info(f"Finished. Collected {len(completed_urls)} cases.")
+    logger.info(f"Finished. {stats.line()}")
+    logger.info(f"Collected {len(completed_urls) + stats.collected} cases in total.")
+    return stats
+
+
+def main(workers=16, rate_per_host=None):
+    with open(INPUT_PATH, encoding="utf-8") as f:
+        cases = json.load(f)
+    asyncio.run(collect(cases, workers=workers, rate_per_host=rate_per_host))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collect raw case texts from sudact.ru.")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent requests")
+    parser.add_argument("--rate", type=float, help="Requests per second to sudact.ru")
+    args = parser.parse_args()
+    main(workers=args.workers, rate_per_host=args.rate)
@@ -1,21 +1,23 @@
-import requests
 from bs4 import BeautifulSoup
 import json
-import time
 import re
 import os
+import asyncio
+import argparse
 import dateparser
-import urllib3
-from datetime import datetime
+from datetime import date
 from urllib.parse import urljoin
 from parsing_cases.utils import resolve_output_path
+from parsing_laws.crawler import Crawler
+from parsing_laws.http_cache import get_http_cache
 from logger import get_logger, auto_logger
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 BASE_URL = "https://sudact.ru"
 MAX_PAGES = 30
-OUTPUT_PATH = resolve_output_path("data/cases_data/case_links.json")
+# Pages of one topic requested at a time; a topic stops at its first empty page
+PAGE_WINDOW = 5
+# Unique by case_url; replaces the old case_links.json + deduplicate_urls.py pair
+OUTPUT_PATH = resolve_output_path("data/cases_data/case_links_deduped.json")
 
 START_URLS = {
     "https://sudact.ru/practice/sudebnaya-praktika-po-ugolovnym-delam/": "УК РФ",
@@ -23,23 +25,47 @@ START_URLS = {
     "https://sudact.ru/practice/sudebnaya-praktika-po-grazhdanskomu-kodeksu/": "ГК РФ",
 }
 
-
-@auto_logger
-def get_soup(url, logger=None):
-    try:
-        res = requests.get(
-            url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10, verify=False
-        )
-        res.raise_for_status()
-        return BeautifulSoup(res.text, "lxml")
-    except Exception as e:
-        logger.error(f"Failed to load {url} => {e}")
+RU_MONTHS = {
+    "января": 1,
+    "февраля": 2,
+    "марта": 3,
+    "апреля": 4,
+    "мая": 5,
+    "июня": 6,
+    "июля": 7,
+    "августа": 8,
+    "сентября": 9,
+    "октября": 10,
+    "ноября": 11,
+    "декабря": 12,
+}
+RU_DATE = re.compile(r"^(\d{1,2})\s+([а-яё]+)\s+(\d{4})(?:\s*г\.?)?$", re.IGNORECASE)
+
+
+def parse_ru_date(raw_date):
+    # "5 марта 2021 г." -> "05.03.2021"; dateparser (slow) only for other formats
+    match = RU_DATE.match(raw_date.strip())
+    if match:
+        month = RU_MONTHS.get(match.group(2).lower())
+        if month:
+            try:
+                return date(int(match.group(3)), month, int(match.group(1))).strftime("%d.%m.%Y")
+            except ValueError:
+                return None
+    parsed = dateparser.parse(raw_date, languages=["ru"])
+    return parsed.strftime("%d.%m.%Y") if parsed else None
+
+
+async def get_soup(crawler, url):
+    page = await crawler.get_page(url)
+    if page is None:
         return None
+    return await asyncio.to_thread(BeautifulSoup, page[0], "lxml")
 
 
 @auto_logger
-def parse_main_page(start_url, case_code, logger=None):
-    soup = get_soup(start_url)
+async def parse_main_page(crawler, start_url, case_code, logger=None):
+    soup = await get_soup(crawler, start_url)
     if not soup:
         return []
 
@@ -69,83 +95,113 @@ def parse_main_page(start_url, case_code, logger=None):
 
 
 @auto_logger
-def extract_case_links(topic_info, logger=None):
-    topic_url = topic_info["topic_url"]
+def parse_case_links(soup, topic_info, logger=None):
     collected = []
+    for a in soup.select("a[href^='/regular/doc/']"):
+        full_text = a.get_text(strip=True)
+        href = a.get("href")
+        full_url = urljoin(BASE_URL, href)
+
+        case_type_match = re.match(r"^(.*?) №", full_text)
+        date_match = re.search(r"от (.+?) по делу", full_text)
+        case_no_match = re.search(
+            r"№\s*(.+?)\s+от\s+\d{1,2}\s+\S+\s+\d{4}\s+г\.", full_text
+        )
+
+        if not (case_type_match and date_match and case_no_match):
+            continue
+
+        raw_date = date_match.group(1).strip()
+        case_date = parse_ru_date(raw_date)
+        if not case_date:
+            logger.warning(f"Date parse failed on: {raw_date}")
+            continue
+
+        collected.append(
+            {
+                "case_code": topic_info["case_code"],
+                "case_topic": topic_info["case_topic"],
+                "case_norm": topic_info["case_norm"],
+                "case_type": case_type_match.group(1).strip(),
+                "case_date": case_date,
+                "case_no": case_no_match.group(1).strip(),
+                "case_url": full_url,
+            }
+        )
+    return collected
+
 
-    for page in range(1, MAX_PAGES + 1):
-        page_url = f"{topic_url}?page={page}"
-        logger.info(f"Scanning page {page}: {page_url}")
-        soup = get_soup(page_url)
-        if not soup:
-            break
-
-        found = 0
-        for a in soup.select("a[href^='/regular/doc/']"):
-            full_text = a.get_text(strip=True)
-            href = a.get("href")
-            full_url = urljoin(BASE_URL, href)
-
-            case_type_match = re.match(r"^(.*?) №", full_text)
-            date_match = re.search(r"от (.+?) по делу", full_text)
-            case_no_match = re.search(
-                r"№\s*(.+?)\s+от\s+\d{1,2}\s+\S+\s+\d{4}\s+г\.", full_text
-            )
-
-            if not (case_type_match and date_match and case_no_match):
-                continue
-
-            raw_date = date_match.group(1).strip()
-            parsed_date = dateparser.parse(raw_date, languages=["ru"])
-            if not parsed_date:
-                logger.warning(f"Date parse failed on: {raw_date}")
-                continue
-            case_date = parsed_date.strftime("%d.%m.%Y")
-
-            collected.append(
-                {
-                    "case_code": topic_info["case_code"],
-                    "case_topic": topic_info["case_topic"],
-                    "case_norm": topic_info["case_norm"],
-                    "case_type": case_type_match.group(1).strip(),
-                    "case_date": case_date,
-                    "case_no": case_no_match.group(1).strip(),
-                    "case_url": full_url,
-                }
-            )
-            found += 1
-
-        if found == 0:
-            logger.info("No cases found on this page — stopping.")
-            break
-
-        time.sleep(0.3)
+@auto_logger
+async def extract_case_links(crawler, topic_info, logger=None):
+    # Pages are requested PAGE_WINDOW at a time and consumed in order; the
+    # first page that fails or has no cases ends the topic
+    topic_url = topic_info["topic_url"]
+    collected = []
 
+    async def scan(page):
+        soup = await get_soup(crawler, f"{topic_url}?page={page}")
+        return parse_case_links(soup, topic_info) if soup else []
+
+    for first in range(1, MAX_PAGES + 1, PAGE_WINDOW):
+        pages = range(first, min(first + PAGE_WINDOW, MAX_PAGES + 1))
+        for page, cases in zip(pages, await asyncio.gather(*[scan(p) for p in pages])):
+            if not cases:
+                logger.info(f"No cases on page {page} of {topic_url} — stopping.")
+                return collected
+            collected.extend(cases)
     return collected
 
 
-def main():
+async def collect_section(crawler, start_url, code, logger):
+    logger.info(f"Starting code section: {code}")
+    topics = await parse_main_page(crawler, start_url, code)
+    per_topic = await asyncio.gather(*[extract_case_links(crawler, topic) for topic in topics])
+    for topic, cases in zip(topics, per_topic):
+        logger.info(f"{code} / {topic['case_topic']}: {len(cases)} cases")
+    return per_topic
+
+
+def dedupe_cases(sections):
+    # Merged in section/topic/page order, as the sequential crawl saw them, so
+    # a case listed under several topics always keeps the same metadata no
+    # matter which page happened to arrive first
+    seen = set()
+    unique = []
+    for per_topic in sections:
+        for cases in per_topic:
+            for case in cases:
+                if case["case_url"] not in seen:
+                    seen.add(case["case_url"])
+                    unique.append(case)
+    return unique
+
+
+async def main(rate_per_host=None, concurrency=None):
     logger = get_logger()
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    all_cases = []
-
-    for start_url, code in START_URLS.items():
-        logger.info(f"Starting code section: {code}")
-        topics = parse_main_page(start_url, code, logger=logger)
+    options = {"cache": get_http_cache()}
+    if rate_per_host:
+        options["rate_per_host"] = rate_per_host
+    if concurrency:
+        options["concurrency"] = concurrency
+    async with Crawler(**options) as crawler:
+        sections = await asyncio.gather(
+            *[collect_section(crawler, url, code, logger) for url, code in START_URLS.items()]
+        )
 
-        for topic in topics:
-            logger.info(
-                f"Processing topic: {topic['case_topic']} ({topic['case_norm']})"
-            )
-            topic_cases = extract_case_links(topic, logger=logger)
-            all_cases.extend(topic_cases)
+    unique = dedupe_cases(sections)
+    total = sum(len(cases) for per_topic in sections for cases in per_topic)
 
     with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(all_cases, f, ensure_ascii=False, indent=2)
+        json.dump(unique, f, ensure_ascii=False, indent=2)
 
-    logger.info(f"Saved {len(all_cases)} case entries to {OUTPUT_PATH}")
+    logger.info(f"Saved {len(unique)} unique case entries ({total} links) to {OUTPUT_PATH}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Collect case links from sudact.ru practice pages.")
+    parser.add_argument("--rate", type=float, help="Requests per second to sudact.ru")
+    parser.add_argument("--concurrency", type=int, help="Concurrent requests")
+    args = parser.parse_args()
+    asyncio.run(main(args.rate, args.concurrency))
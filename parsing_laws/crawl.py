@@ -0,0 +1,146 @@
+import os
+import json
+import asyncio
+import argparse
+import yaml
+from parsing_laws.utils import resolve_output_path
+from parsing_laws.crawler import Crawler, collect_law_links
+from parsing_laws.http_cache import HTTPCache, HTTP_CACHE_PATH
+from logger import get_logger
+
+logger = get_logger()
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "law_sources.yaml")
+
+
+def load_registry(path=REGISTRY_PATH, codes=None):
+    with open(path, "r", encoding="utf-8") as f:
+        registry = yaml.safe_load(f)
+    sources = registry["sources"]
+    for source in sources:
+        source.setdefault("base_url", registry.get("base_url", "https://sudact.ru"))
+        source.setdefault("law_name", registry.get("law_name", "статья"))
+    if codes:
+        unknown = set(codes) - {source["law_code"] for source in sources}
+        if unknown:
+            raise ValueError(f"Unknown law codes: {sorted(unknown)}")
+        sources = [source for source in sources if source["law_code"] in codes]
+    return sources
+
+
+def load_previous_texts(sources):
+    # Article texts of the last run, reused for pages the server reports unchanged
+    previous = {}
+    for output in {source["output"] for source in sources}:
+        path = resolve_output_path(output)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                previous.update((article["url"], article["text"]) for article in json.load(f))
+    return previous
+
+
+async def crawl_sources(crawler, sources, previous=None):
+    # Link pages of every source first, then all articles through the one
+    # crawler pool; an article URL listed by several sources is fetched once
+    previous = previous or {}
+    links = await asyncio.gather(
+        *[
+            collect_law_links(
+                crawler,
+                source["law_code"],
+                source["start_urls"],
+                source["law_name"],
+                source["base_url"],
+            )
+            for source in sources
+        ]
+    )
+    urls = list(dict.fromkeys(url for law_links in links for url in law_links.values()))
+    total = sum(len(law_links) for law_links in links)
+    logger.info(f"Fetching {len(urls)} articles ({total - len(urls)} duplicate links skipped)")
+    texts = await asyncio.gather(
+        *[crawler.extract_article_text(url, previous.get(url)) for url in urls]
+    )
+    texts = dict(zip(urls, texts))
+    changed = sum(1 for url in urls if texts[url] and texts[url] != previous.get(url))
+    logger.info(f"{changed} articles new or changed since the last run")
+
+    results = []
+    for source, law_links in zip(sources, links):
+        articles = [
+            {"law_code": source["law_code"], "law_number": number, "url": url, "text": texts[url]}
+            for number, url in law_links.items()
+            if texts[url]
+        ]
+        logger.info(f"{source['law_code']}: {len(articles)}/{len(law_links)} articles parsed")
+        results.append(articles)
+    return results
+
+
+def save_outputs(sources, results):
+    # Sources that share an output file are concatenated in registry order
+    outputs = {}
+    for source, articles in zip(sources, results):
+        outputs.setdefault(source["output"], []).extend(articles)
+    for output, articles in outputs.items():
+        path = resolve_output_path(output)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(articles, f, ensure_ascii=False, indent=2)
+        logger.info(f"Saved {len(articles)} articles to {path}")
+
+
+async def main(
+    codes=None,
+    registry_path=REGISTRY_PATH,
+    concurrency=None,
+    rate_per_host=None,
+    use_cache=True,
+):
+    sources = load_registry(registry_path)
+    if codes:
+        # Re-crawling part of a shared file would drop the other sources' articles
+        outputs = {source["output"] for source in load_registry(registry_path, codes)}
+        sources = [source for source in sources if source["output"] in outputs]
+    logger.info(f"Crawling {len(sources)} law sources")
+
+    # Unchanged articles come out identical, so `load_to_qdrant.py --diff`
+    # afterwards only upserts what actually changed
+    cache = HTTPCache() if use_cache and HTTP_CACHE_PATH else None
+    previous = load_previous_texts(sources) if cache is not None else {}
+    options = {"cache": cache}
+    if concurrency:
+        options["concurrency"] = concurrency
+    if rate_per_host:
+        options["rate_per_host"] = rate_per_host
+    async with Crawler(**options) as crawler:
+        results = await crawl_sources(crawler, sources, previous)
+    if cache is not None:
+        cache.close()
+    save_outputs(sources, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Scrape all law sources from the registry in one parallel run."
+    )
+    parser.add_argument(
+        "--code",
+        action="append",
+        dest="codes",
+        help="Law code from the registry to scrape (repeatable); other sources "
+        "written to the same output file are included",
+    )
+    parser.add_argument("--registry", default=REGISTRY_PATH)
+    parser.add_argument("--concurrency", type=int, help="Concurrent requests")
+    parser.add_argument("--rate", type=float, help="Requests per second per host")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Download and parse every page instead of sending conditional requests",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(args.codes, args.registry, args.concurrency, args.rate, not args.no_cache)
+    )
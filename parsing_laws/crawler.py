@@ -0,0 +1,248 @@
+import os
+import time
+import random
+import asyncio
+from collections import Counter
+from urllib.parse import urlsplit
+import aiohttp
+from bs4 import BeautifulSoup
+from parsing_laws.utils import HEADERS, parse_statia_links, parse_article_text
+from logger import get_logger
+
+logger = get_logger()
+
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", 8))
+# Requests per second per host; the old scripts made about 2-3 serially
+CRAWL_RATE_PER_HOST = float(os.getenv("CRAWL_RATE_PER_HOST", 4))
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", 30))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    # `rate` requests per second on average, bursts of up to `burst`
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in FIFO order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AiohttpTransport:
+    # Default transport: one pooled keep-alive session. Anything with the same
+    # get(url, headers) coroutine returning (status, headers, body bytes) can
+    # replace it, e.g. a client for a local fixture server.
+
+    def __init__(self, limit=CRAWL_CONCURRENCY, timeout=CRAWL_TIMEOUT, verify_ssl=False):
+        self.limit = limit
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.verify_ssl = verify_ssl
+        self._session = None
+
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit,
+                ssl=None if self.verify_ssl else False,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def get(self, url, headers=None):
+        async with self.session().get(url, headers=headers) as response:
+            return response.status, dict(response.headers), await response.read()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class Crawler:
+    # Async page fetcher for the law and case scrapers: bounded concurrency,
+    # a token bucket per host and exponential backoff with jitter on 429/5xx
+    # and network errors (Retry-After is honoured when present).
+    # With an HTTPCache, requests are conditional and unchanged pages are
+    # reported as such, so callers can skip parsing them.
+
+    def __init__(
+        self,
+        transport=None,
+        concurrency=CRAWL_CONCURRENCY,
+        rate_per_host=CRAWL_RATE_PER_HOST,
+        burst=None,
+        retries=5,
+        backoff=1.0,
+        max_backoff=60.0,
+        headers=HEADERS,
+        cache=None,
+    ):
+        self.transport = transport or AiohttpTransport(limit=concurrency)
+        self.rate_per_host = rate_per_host
+        self.burst = burst or max(1, int(rate_per_host))
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.headers = headers
+        self.cache = cache
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets = {}
+        self.stats = Counter()
+        self.started = time.monotonic()
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return self._buckets[host]
+
+    def _retry_delay(self, attempt, headers):
+        # Header names are case-insensitive; transports may hand over a plain dict
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        retry_after = headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _request(self, url, headers):
+        # Rate limit first, then hold a concurrency slot only for the request itself
+        await self._bucket(url).acquire()
+        async with self._semaphore:
+            self.stats["requests"] += 1
+            return await self.transport.get(url, headers=headers)
+
+    async def fetch(self, url, headers=None):
+        # Returns (status, headers, body) of the final attempt, or None when
+        # the request never got a response
+        request_headers = {**self.headers, **(headers or {})}
+        for attempt in range(self.retries + 1):
+            try:
+                status, response_headers, body = await self._request(url, request_headers)
+            except Exception as e:
+                status, response_headers, body = None, {}, None
+                reason = repr(e)
+            else:
+                if status not in RETRY_STATUSES:
+                    return status, response_headers, body
+                reason = f"HTTP {status}"
+
+            if attempt == self.retries:
+                break
+            delay = self._retry_delay(attempt, response_headers)
+            self.stats["retries"] += 1
+            logger.warning(f"{reason} for {url}, retry {attempt + 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        logger.error(f"Failed to load {url} after {self.retries + 1} attempts ({reason})")
+        self.stats["failed"] += 1
+        return (status, response_headers, body) if status is not None else None
+
+    async def get_page(self, url, headers=None):
+        # (body, changed) or None; changed is False for 304s and for 200s
+        # whose content matches the cached copy
+        headers = dict(headers or {})
+        validators = self.cache.validators(url) if self.cache is not None else {}
+        response = await self.fetch(url, {**headers, **validators})
+        if response is None:
+            return None
+        status, response_headers, body = response
+        if status == 304 and self.cache is not None:
+            cached = self.cache.not_modified(url)
+            if cached is not None:
+                self.stats["not_modified"] += 1
+                return cached, False
+        if status == 304 and validators:
+            # The cached body is gone; ask again unconditionally for a fresh copy
+            logger.warning(f"304 for {url} without a cached body, fetching it again")
+            response = await self.fetch(url, headers)
+            if response is None:
+                return None
+            status, response_headers, body = response
+        if not 200 <= status < 300:
+            if status not in RETRY_STATUSES:
+                logger.error(f"HTTP error {status} while accessing {url}")
+                self.stats["failed"] += 1
+            return None
+        self.stats["ok"] += 1
+        if self.cache is None:
+            return body, True
+        return body, self.cache.store(url, response_headers, body)
+
+    async def get_soup(self, url):
+        page = await self.get_page(url)
+        if page is None:
+            return None
+        # Parsing is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(BeautifulSoup, page[0], "lxml")
+
+    async def extract_statia_links(
+        self, start_url, law_name="статья", base_url="https://sudact.ru"
+    ):
+        logger.info(f"Extracting article links from {start_url}")
+        soup = await self.get_soup(start_url)
+        if not soup:
+            return {}
+        return parse_statia_links(soup, law_name, base_url)
+
+    async def extract_article_text(self, url, previous_text=None):
+        # previous_text is the article parsed on an earlier run; it is reused
+        # without parsing when the page hasn't changed since
+        page = await self.get_page(url)
+        if page is None:
+            return None
+        body, changed = page
+        if not changed and previous_text:
+            self.stats["unchanged"] += 1
+            return previous_text
+        soup = await asyncio.to_thread(BeautifulSoup, body, "lxml")
+        return parse_article_text(soup, url)
+
+    def log_stats(self):
+        elapsed = time.monotonic() - self.started
+        logger.info(
+            f"Crawl stats: {dict(self.stats)} in {elapsed:.1f}s "
+            f"({self.stats['requests'] / max(elapsed, 1e-9):.1f} requests/sec)"
+        )
+
+    async def close(self):
+        self.log_stats()
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def collect_law_links(
+    crawler, law_code, start_urls, law_name="статья", base_url="https://sudact.ru"
+):
+    # Article number -> URL over all parts of a law, in link page order
+    merged_links = {}
+    part_links = await asyncio.gather(
+        *[crawler.extract_statia_links(url, law_name, base_url) for url in start_urls]
+    )
+    for links in part_links:
+        for number, href in links.items():
+            if number in merged_links:
+                logger.warning(f"Duplicate article number in {law_code}: {number} from {href}")
+            merged_links[number] = href
+    logger.info(f"{law_code}: {len(merged_links)} unique articles found")
+    return merged_links
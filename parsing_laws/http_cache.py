@@ -0,0 +1,113 @@
+import os
+import time
+import zlib
+import hashlib
+import sqlite3
+import threading
+from collections import Counter
+from logger import get_logger
+
+logger = get_logger()
+
+# Empty string disables the cache
+HTTP_CACHE_PATH = os.getenv(
+    "HTTP_CACHE_PATH", os.path.join("data", "cache", "http_cache.sqlite")
+)
+
+
+class HTTPCache:
+    # On-disk cache of fetched pages for conditional re-scrapes: validators
+    # (ETag / Last-Modified) are sent back as If-None-Match / If-Modified-Since,
+    # a 304 is answered from the zlib-compressed body, and store() reports
+    # whether a 200 actually changed the content (servers that ignore
+    # validators still resend identical pages).
+
+    def __init__(self, db_path=HTTP_CACHE_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT, "
+            "body BLOB, fetched REAL, checked REAL)"
+        )
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def validators(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def load(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM pages WHERE url = ?", (url,)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def not_modified(self, url):
+        # Body of a 304 response, or None if the page is no longer cached
+        body = self.load(url)
+        if body is not None:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "UPDATE pages SET checked = ? WHERE url = ?", (time.time(), url)
+                )
+            self.stats["not_modified"] += 1
+        return body
+
+    def store(self, url, headers, body):
+        # Returns True when the page is new or its content differs from the cached copy
+        content_hash = hashlib.sha1(body).hexdigest()
+        now = time.time()
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT content_hash FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            changed = row is None or row[0] != content_hash
+            if changed:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pages "
+                    "(url, etag, last_modified, content_hash, body, fetched, checked) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        url,
+                        headers.get("etag"),
+                        headers.get("last-modified"),
+                        content_hash,
+                        zlib.compress(body, 6),
+                        now,
+                        now,
+                    ),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE pages SET etag = ?, last_modified = ?, checked = ? WHERE url = ?",
+                    (headers.get("etag"), headers.get("last-modified"), now, url),
+                )
+        self.stats["new" if row is None else "changed" if changed else "unchanged"] += 1
+        return changed
+
+    def close(self):
+        if self.stats:
+            logger.info(f"HTTP cache {self.db_path}: {dict(self.stats)}")
+        self._conn.close()
+
+
+_http_cache = None
+
+
+def get_http_cache():
+    # Process-wide cache shared by the crawlers; None when disabled
+    global _http_cache
+    if _http_cache is None and HTTP_CACHE_PATH:
+        _http_cache = HTTPCache(HTTP_CACHE_PATH)
+    return _http_cache
@@ -1,13 +1,8 @@
-import requests
-from bs4 import BeautifulSoup
-import urllib3
 import logging
 import os
 import re
 from urllib.parse import urljoin
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -16,24 +11,7 @@ logging.basicConfig(
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
 
-def get_soup(url):
-    try:
-        r = requests.get(url, headers=HEADERS, timeout=10, verify=False)
-        r.raise_for_status()
-        return BeautifulSoup(r.text, "lxml")
-    except requests.HTTPError as e:
-        logging.error(f"HTTP error {r.status_code} while accessing {url}")
-    except Exception as e:
-        logging.error(f"Failed to load {url} => {e}")
-    return None
-
-
-def extract_statia_links(start_url, law_name="статья", base_url="https://sudact.ru"):
-    logging.info(f"Extracting article links from {start_url}")
-    soup = get_soup(start_url)
-    if not soup:
-        return {}
-
+def parse_statia_links(soup, law_name="статья", base_url="https://sudact.ru"):
     statia_links = {}
 
     for a in soup.select("a[href*='/statia-']"):
@@ -56,11 +34,7 @@ def extract_statia_links(start_url, law_name="статья", base_url="https://s
     return dict(sorted(statia_links.items(), key=lambda x: smart_key(x[0])))
 
 
-def extract_article_text(url):
-    soup = get_soup(url)
-    if not soup:
-        return None
-
+def parse_article_text(soup, url):
     body = soup.select_one("#law_text_body")
     if not body:
         logging.error(f"No law_text_body found at {url}")
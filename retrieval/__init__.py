@@ -1,12 +1,50 @@
-from retrieval.config import load_config
-from retrieval.tools import (
-    load_dense_model,
-    load_sparse_model,
-    get_qdrant_client,
-    match_article,
-    search_qdrant,
-    search_with_precomputed_vectors,
-    get_reranked_case_chunks,
-    get_reranked_law_articles
-)
-from retrieval.reranker import ONNXReranker
\ No newline at end of file
+import importlib
+
+# Public names are resolved on first access, so light modules such as
+# retrieval.cache and retrieval.text_store can be imported (e.g. by the
+# ingestion scripts and tests) without loading the model stack of
+# retrieval.tools and retrieval.reranker
+_EXPORTS = {
+    "load_config": "retrieval.config",
+    "load_dense_model": "retrieval.tools",
+    "load_sparse_model": "retrieval.tools",
+    "get_qdrant_client": "retrieval.tools",
+    "build_search_params": "retrieval.tools",
+    "build_filter": "retrieval.tools",
+    "match_article": "retrieval.tools",
+    "search_qdrant": "retrieval.tools",
+    "search_with_precomputed_vectors": "retrieval.tools",
+    "get_reranked_case_chunks": "retrieval.tools",
+    "get_reranked_law_articles": "retrieval.tools",
+    "get_reranked_context": "retrieval.tools",
+    "get_reranked_context_batch": "retrieval.tools",
+    "ONNXReranker": "retrieval.reranker",
+    "InferenceExecutor": "retrieval.executor",
+    "get_inference_executor": "retrieval.executor",
+    "run_inference": "retrieval.executor",
+    "BatchingEncoder": "retrieval.batching",
+    "BatchingReranker": "retrieval.batching",
+    "RetrievalCache": "retrieval.cache",
+    "SemanticCache": "retrieval.cache",
+    "ScoreCache": "retrieval.cache",
+    "invalidate_collection_cache": "retrieval.cache",
+    "TextStore": "retrieval.text_store",
+    "TextStoreWriter": "retrieval.text_store",
+    "open_text_store": "retrieval.text_store",
+    "text_store_path": "retrieval.text_store",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,148 @@
+import time
+import asyncio
+from retrieval.executor import run_inference
+from logger import get_logger
+
+logger = get_logger()
+
+LOG_EVERY = 100
+
+
+class MicroBatcher:
+    # Coalesces concurrent requests into one blocking model call. A batch is
+    # flushed when it reaches max_batch_size (measured by _size) or when the
+    # oldest queued request has waited max_wait_ms. Subclasses implement
+    # _process, which receives the queued items and returns one result each.
+
+    name = "batcher"
+
+    def __init__(self, max_batch_size=16, max_wait_ms=5):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []
+        self._pending_size = 0
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.requests = 0
+        self.total_batch_time = 0.0
+
+    def _size(self, item):
+        return 1
+
+    def _process(self, items):
+        raise NotImplementedError
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._pending_size += self._size(item)
+
+        if self._pending_size >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+        self._pending_size = 0
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        items = [item for item, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = await run_inference(self._process, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.total_batch_time += time.perf_counter() - start
+        if self.batches % LOG_EVERY == 0:
+            logger.info(f"{self.name} batching stats: {self.stats()}")
+
+    def stats(self):
+        batches = self.batches or 1
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_requests_per_batch": round(self.requests / batches, 2),
+            "avg_batch_time": round(self.total_batch_time / batches, 4),
+        }
+
+
+class BatchingEncoder(MicroBatcher):
+    # Turns concurrent single-query encodes into one SentenceTransformer.encode call
+
+    name = "Encoder"
+
+    def __init__(self, model, max_batch_size=16, max_wait_ms=5):
+        super().__init__(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.model = model
+
+    def encode(self, sentences, **kwargs):
+        # Synchronous passthrough for offline scripts that batch on their own
+        return self.model.encode(sentences, **kwargs)
+
+    async def encode_async(self, text):
+        return await self.submit(text)
+
+    def _process(self, texts):
+        return self.model.encode(
+            texts, batch_size=len(texts), normalize_embeddings=True
+        )
+
+
+class BatchingReranker(MicroBatcher):
+    # Merges pairs from concurrent rerank requests into shared ONNX runs.
+    # max_batch_size counts pairs, not requests; the reranker itself splits
+    # the merged pairs into length buckets.
+
+    name = "Reranker"
+
+    def __init__(self, reranker, max_batch_size=64, max_wait_ms=10):
+        super().__init__(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.reranker = reranker
+
+    def predict(self, pairs):
+        return self.reranker.predict(pairs)
+
+    async def predict_async(self, pairs):
+        if not pairs:
+            return []
+        return await self.submit(list(pairs))
+
+    def _size(self, pairs):
+        return len(pairs)
+
+    def _process(self, requests):
+        merged = [pair for pairs in requests for pair in pairs]
+        scores = self.reranker.predict(merged)
+
+        results = []
+        offset = 0
+        for pairs in requests:
+            results.append(scores[offset : offset + len(pairs)])
+            offset += len(pairs)
+        return results
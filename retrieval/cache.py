@@ -0,0 +1,338 @@
+import os
+import re
+import copy
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from collections import OrderedDict
+from logger import get_logger
+
+logger = get_logger()
+
+RETRIEVAL_CACHE_PATH = os.getenv(
+    "RETRIEVAL_CACHE_PATH", os.path.join("data", "cache", "retrieval_cache.sqlite")
+)
+LOG_EVERY = 100
+
+
+def normalize_query(text):
+    text = text.lower().replace("ё", "е")
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" .,!?;:\"'«»")
+
+
+def _connect(db_path):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS results ("
+        "key TEXT PRIMARY KEY, collection TEXT, generation INTEGER, created REAL, value TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS generations (collection TEXT PRIMARY KEY, generation INTEGER)"
+    )
+    return conn
+
+
+def invalidate_collection_cache(collection_name, db_path=RETRIEVAL_CACHE_PATH):
+    # Called by ingestion whenever a collection is rebuilt. Bumping the
+    # generation makes every process sharing the cache file drop old entries.
+    if not os.path.exists(db_path):
+        return
+    conn = _connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO generations (collection, generation) VALUES (?, 1) "
+            "ON CONFLICT(collection) DO UPDATE SET generation = generation + 1",
+            (collection_name,),
+        )
+        conn.execute("DELETE FROM results WHERE collection = ?", (collection_name,))
+    conn.close()
+    logger.info(f"Invalidated retrieval cache for collection '{collection_name}'")
+
+
+class RetrievalCache:
+    # Two-tier cache for reranked retrieval results: an in-memory LRU in front
+    # of an optional SQLite file that survives bot restarts. Entries expire
+    # after ttl_seconds and are tied to the collection generation.
+
+    def __init__(
+        self,
+        namespace="",
+        max_entries=1024,
+        ttl_seconds=24 * 3600,
+        db_path=None,
+        generation_refresh_seconds=30,
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.generation_refresh = generation_refresh_seconds
+        self._memory = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        self._conn = _connect(db_path) if db_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, kind, collection, query):
+        raw = "\x1f".join([self.namespace, kind, collection, normalize_query(query)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def generation(self, collection):
+        return self._generation(collection)
+
+    def _generation(self, collection):
+        now = time.time()
+        cached = self._generations.get(collection)
+        if cached and now - cached[1] < self.generation_refresh:
+            return cached[0]
+
+        generation = cached[0] if cached else 0
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT generation FROM generations WHERE collection = ?", (collection,)
+            ).fetchone()
+            generation = row[0] if row else 0
+        self._generations[collection] = (generation, now)
+        return generation
+
+    def contains(self, kind, collection, query):
+        return self._lookup(kind, collection, query, record=False) is not None
+
+    def get(self, kind, collection, query):
+        return self._lookup(kind, collection, query, record=True)
+
+    def _lookup(self, kind, collection, query, record):
+        key = self._key(kind, collection, query)
+        generation = self._generation(collection)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created, entry_generation = entry
+                if now - created < self.ttl and entry_generation == generation:
+                    self._memory.move_to_end(key)
+                    if record:
+                        self._record(hit=True)
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT value, created, generation FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] < self.ttl and row[2] == generation:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1], generation)
+                self.disk_hits += 1
+                if record:
+                    self._record(hit=True)
+                return copy.deepcopy(value)
+
+        if record:
+            self._record(hit=False)
+        return None
+
+    def set(self, kind, collection, query, value):
+        key = self._key(kind, collection, query)
+        generation = self._generation(collection)
+        created = time.time()
+        self._remember(key, copy.deepcopy(value), created, generation)
+
+        if self._conn is not None:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, collection, generation, created, value) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, collection, generation, created, json.dumps(value, ensure_ascii=False)),
+                )
+
+    def invalidate(self, collection):
+        if self.db_path:
+            invalidate_collection_cache(collection, self.db_path)
+            self._generations.pop(collection, None)
+        else:
+            generation = self._generation(collection) + 1
+            self._generations[collection] = (generation, time.time())
+
+    def _remember(self, key, value, created, generation):
+        with self._lock:
+            self._memory[key] = (value, created, generation)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if (self.hits + self.misses) % LOG_EVERY == 0:
+            logger.info(f"Retrieval cache stats: {self.stats()}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class SemanticCache:
+    # Keeps the most recent query embeddings per (kind, collection) in a ring
+    # buffer and returns the cached documents of the nearest previous query
+    # when its cosine similarity reaches the threshold. Query vectors are
+    # expected to be L2-normalized, so cosine similarity is a dot product.
+    # When a RetrievalCache is passed as generations, entries are dropped
+    # after ingestion bumps the collection generation.
+
+    def __init__(self, capacity=512, threshold=0.95, ttl_seconds=24 * 3600, generations=None):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl_seconds
+        self.generations = generations
+        self._rings = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _current_generation(self, collection):
+        return self.generations.generation(collection) if self.generations else 0
+
+    def lookup(self, kind, collection, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        generation = self._current_generation(collection)
+        now = time.time()
+
+        with self._lock:
+            ring = self._rings.get((kind, collection))
+            if ring is not None and ring["size"]:
+                size = ring["size"]
+                similarities = ring["vectors"][:size] @ vector
+                valid = (now - ring["created"][:size] < self.ttl) & (
+                    ring["generation"][:size] == generation
+                )
+                similarities[~valid] = -1.0
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._record(hit=True)
+                    return copy.deepcopy(ring["values"][best])
+
+            self._record(hit=False)
+            return None
+
+    def add(self, kind, collection, vector, value):
+        vector = np.asarray(vector, dtype=np.float32)
+        generation = self._current_generation(collection)
+
+        with self._lock:
+            ring = self._rings.get((kind, collection))
+            if ring is None or ring["vectors"].shape[1] != vector.shape[0]:
+                ring = {
+                    "vectors": np.zeros((self.capacity, vector.shape[0]), dtype=np.float32),
+                    "created": np.zeros(self.capacity),
+                    "generation": np.zeros(self.capacity, dtype=np.int64),
+                    "values": [None] * self.capacity,
+                    "next": 0,
+                    "size": 0,
+                }
+                self._rings[(kind, collection)] = ring
+
+            slot = ring["next"]
+            ring["vectors"][slot] = vector
+            ring["created"][slot] = time.time()
+            ring["generation"][slot] = generation
+            ring["values"][slot] = copy.deepcopy(value)
+            ring["next"] = (slot + 1) % self.capacity
+            ring["size"] = min(ring["size"] + 1, self.capacity)
+
+    def invalidate(self, collection):
+        with self._lock:
+            for key in [key for key in self._rings if key[1] == collection]:
+                del self._rings[key]
+
+    def _record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if (self.hits + self.misses) % LOG_EVERY == 0:
+            logger.info(f"Semantic cache stats: {self.stats()}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class ScoreCache:
+    # Bounded cache of cross-encoder scores keyed by (query hash, point id),
+    # so popular questions only send unseen documents to the reranker.
+    # eviction is "lru" (evict least recently used) or "fifo" (evict oldest).
+
+    def __init__(self, max_entries=50000, eviction="lru"):
+        if eviction not in {"lru", "fifo"}:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, query, point_id):
+        return hashlib.sha1(query.encode("utf-8")).hexdigest(), str(point_id)
+
+    def get(self, query, point_id):
+        if point_id is None:
+            return None
+        key = self._key(query, point_id)
+        with self._lock:
+            score = self._scores.get(key)
+            if score is not None and self.eviction == "lru":
+                self._scores.move_to_end(key)
+        self._record(hit=score is not None)
+        return score
+
+    def set(self, query, point_id, score):
+        if point_id is None:
+            return
+        key = self._key(query, point_id)
+        with self._lock:
+            self._scores[key] = score
+            if self.eviction == "lru":
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def _record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if (self.hits + self.misses) % (LOG_EVERY * 10) == 0:
+            logger.info(f"Rerank score cache stats: {self.stats()}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._scores),
+            "eviction": self.eviction,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
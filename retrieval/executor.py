@@ -0,0 +1,98 @@
+import os
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logger import get_logger
+
+logger = get_logger()
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 2))
+LOG_EVERY = 50
+
+
+class InferenceExecutor:
+    # Runs blocking model calls (SentenceTransformer, fastembed, ONNX) on a
+    # bounded thread pool so they never stall the asyncio event loop.
+    # torch and onnxruntime release the GIL, so threads give real parallelism.
+
+    def __init__(self, max_workers=INFERENCE_WORKERS, slow_wait_threshold=1.0):
+        self.max_workers = max_workers
+        self.slow_wait_threshold = slow_wait_threshold
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="inference"
+        )
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def job():
+            started_at = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finished_at = time.perf_counter()
+                self._record(started_at - submitted_at, finished_at - started_at)
+
+        return await loop.run_in_executor(self._pool, job)
+
+    def _record(self, wait, duration):
+        with self._lock:
+            self.running -= 1
+            self.completed += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.total_run += duration
+            completed = self.completed
+
+        if wait > self.slow_wait_threshold:
+            logger.warning(
+                f"Inference job waited {wait:.2f}s in queue (queued={self.queued}, running={self.running})"
+            )
+        if completed % LOG_EVERY == 0:
+            logger.info(f"Inference executor stats: {self.stats()}")
+
+    def stats(self):
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "avg_wait": round(self.total_wait / completed, 4),
+                "max_wait": round(self.max_wait, 4),
+                "avg_run": round(self.total_run / completed, 4),
+            }
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+_executor = None
+
+
+def get_inference_executor():
+    global _executor
+    if _executor is None:
+        _executor = InferenceExecutor()
+        logger.info(f"Inference executor started with {_executor.max_workers} workers")
+    return _executor
+
+
+async def run_inference(func, *args, **kwargs):
+    return await get_inference_executor().run(functools.partial(func, *args, **kwargs))
@@ -0,0 +1,66 @@
+import os
+import aiohttp
+from logger import get_logger
+
+logger = get_logger()
+
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 20))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 10))
+# LLM completions can stay silent for minutes while the model reasons
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 600))
+
+
+class HTTPClient:
+    # Application-lifetime aiohttp session with a pooled, keep-alive connector.
+    # The session is created lazily inside the running event loop and must be
+    # closed on shutdown with close().
+
+    def __init__(
+        self,
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        read_timeout=HTTP_READ_TIMEOUT,
+        keepalive_timeout=60,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(
+            total=None, connect=connect_timeout, sock_read=read_timeout
+        )
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout
+            )
+            logger.info(
+                f"HTTP session opened (limit={self.limit}, per_host={self.limit_per_host})"
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("HTTP session closed")
+        self._session = None
+
+
+_http_client = HTTPClient()
+
+
+def get_http_session():
+    return _http_client.session()
+
+
+async def close_http_session():
+    await _http_client.close()
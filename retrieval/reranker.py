@@ -1,24 +1,68 @@
+import threading
 import onnxruntime
 from transformers import AutoTokenizer
 import numpy as np
 
 class ONNXReranker:
-    def __init__(self, model_path="C:\\models\\bge-reranker-v2-m3-onnx-o3-cpu\\model.onnx", tokenizer_name="BAAI/bge-reranker-v2-m3"):
+    def __init__(
+        self,
+        model_path="C:\\models\\bge-reranker-v2-m3-onnx-o3-cpu\\model.onnx",
+        tokenizer_name="BAAI/bge-reranker-v2-m3",
+        max_length=8192,
+        max_tokens_per_run=16384,
+    ):
         self.session = onnxruntime.InferenceSession(model_path)
         self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        self.max_length = max_length
+        # Upper bound on padded tokens (batch size x longest pair) per session run
+        self.max_tokens_per_run = max_tokens_per_run
+        # Fast tokenizers are not safe to call from several inference threads at once
+        self._tokenizer_lock = threading.Lock()
 
     def predict(self, pairs):
-        inputs = self.tokenizer(
-            [q for q, d in pairs],
-            [d for q, d in pairs],
-            return_tensors="np",
-            padding=True,
-            truncation=True,
-            max_length=8192
-        )
-        onnx_inputs = {
-            "input_ids": inputs["input_ids"].astype(np.int64),
-            "attention_mask": inputs["attention_mask"].astype(np.int64),
-        }
-        logits = self.session.run(None, onnx_inputs)[0]
-        return logits.squeeze().tolist()
+        if not pairs:
+            return []
+
+        with self._tokenizer_lock:
+            encoded = self.tokenizer(
+                [q for q, d in pairs],
+                [d for q, d in pairs],
+                truncation=True,
+                max_length=self.max_length,
+            )
+
+        # Sort by length so short pairs are never padded to a long chunk
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        order = sorted(range(len(pairs)), key=lambda i: lengths[i])
+
+        scores = [0.0] * len(pairs)
+        for bucket in self._length_buckets(order, lengths):
+            with self._tokenizer_lock:
+                inputs = self.tokenizer.pad(
+                    {
+                        "input_ids": [encoded["input_ids"][i] for i in bucket],
+                        "attention_mask": [encoded["attention_mask"][i] for i in bucket],
+                    },
+                    padding=True,
+                    return_tensors="np",
+                )
+            onnx_inputs = {
+                "input_ids": inputs["input_ids"].astype(np.int64),
+                "attention_mask": inputs["attention_mask"].astype(np.int64),
+            }
+            logits = self.session.run(None, onnx_inputs)[0]
+            for i, score in zip(bucket, logits.reshape(-1).tolist()):
+                scores[i] = score
+
+        return scores
+
+    def _length_buckets(self, order, lengths):
+        bucket = []
+        for i in order:
+            # Pairs arrive in ascending length, so lengths[i] is the padded width
+            if bucket and (len(bucket) + 1) * lengths[i] > self.max_tokens_per_run:
+                yield bucket
+                bucket = []
+            bucket.append(i)
+        if bucket:
+            yield bucket
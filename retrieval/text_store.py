@@ -0,0 +1,225 @@
+import os
+import json
+import mmap
+import time
+import uuid
+import hashlib
+import threading
+import numpy as np
+from logger import get_logger
+
+logger = get_logger()
+
+TEXT_STORE_DIR = os.getenv("TEXT_STORE_DIR", os.path.join("data", "text_store"))
+MANIFEST = "manifest.json"
+# Sorted by key; keys are the 16 bytes of the point's UUID
+INDEX_DTYPE = np.dtype([("key", "S16"), ("offset", "<u8"), ("length", "<u4")])
+
+
+def text_store_path(collection_name, root=TEXT_STORE_DIR):
+    return os.path.join(root, collection_name)
+
+
+def _key(point_id):
+    try:
+        return uuid.UUID(str(point_id)).bytes
+    except ValueError:
+        return hashlib.sha1(str(point_id).encode("utf-8")).digest()[:16]
+
+
+def _read_manifest(path):
+    with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _map(path):
+    if os.path.getsize(path) == 0:
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class TextStore:
+    # Read side of the chunk text store: a UTF-8 blob plus a sorted
+    # (key, offset, length) index, both memory-mapped, so a lookup is a binary
+    # search and a slice. Rebuilds by ingestion are picked up by re-reading
+    # the manifest at most every refresh_seconds.
+
+    def __init__(self, path, refresh_seconds=30):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self._open(_read_manifest(path))
+
+    def _open(self, manifest):
+        index = np.load(os.path.join(self.path, manifest["index"]), mmap_mode="r")
+        blob = _map(os.path.join(self.path, manifest["blob"]))
+        # Swapped as one tuple so concurrent readers never mix generations
+        self._state = (index["key"], index["offset"], index["length"], blob)
+        self._manifest = manifest
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now - self._checked < self.refresh_seconds:
+            return
+        with self._lock:
+            self._checked = now
+            try:
+                manifest = _read_manifest(self.path)
+            except (OSError, ValueError):
+                return
+            if manifest != self._manifest:
+                self._open(manifest)
+                logger.info(
+                    f"Text store {self.path} reloaded ({manifest['count']} texts)"
+                )
+
+    def get(self, point_id):
+        self._maybe_refresh()
+        keys, offsets, lengths, blob = self._state
+        key = _key(point_id)
+        i = int(np.searchsorted(keys, key))
+        # S16 values come back without trailing NUL bytes
+        if i == len(keys) or keys[i] != key.rstrip(b"\x00"):
+            return None
+        offset = int(offsets[i])
+        return blob[offset : offset + int(lengths[i])].decode("utf-8")
+
+    def get_many(self, point_ids):
+        return [self.get(point_id) for point_id in point_ids]
+
+    def __len__(self):
+        return len(self._state[0])
+
+
+class TextStoreWriter:
+    # Incremental builder used by ingestion. Texts identical to the stored
+    # ones are skipped, new and changed texts are appended to the blob, and
+    # the blob is compacted once more than compact_ratio of it is dead.
+    # Nothing is visible to readers until commit() replaces the manifest; the
+    # writer stays open, so a later commit(prune=True) can drop texts once no
+    # reader of an older collection version needs them.
+
+    def __init__(self, path, compact_ratio=0.5):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        os.makedirs(path, exist_ok=True)
+
+        self.entries = {}
+        self.generation = 0
+        blob_name = "texts.0.bin"
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            manifest = _read_manifest(path)
+            self.generation = manifest["generation"]
+            blob_name = manifest["blob"]
+            index = np.load(os.path.join(path, manifest["index"]))
+            for key, offset, length in zip(index["key"], index["offset"], index["length"]):
+                self.entries[key.ljust(16, b"\x00")] = (int(offset), int(length))
+
+        self.blob_name = blob_name
+        blob_path = os.path.join(path, blob_name)
+        self._file = open(blob_path, "ab")
+        self._size = self._file.tell()
+        self._existing = _map(blob_path) if self._size else b""
+        self._touched = set()
+        self.written = 0
+        self.unchanged = 0
+
+    def put(self, point_id, text):
+        key = _key(point_id)
+        self._touched.add(key)
+        data = text.encode("utf-8")
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] == len(data):
+            offset, length = entry
+            if offset + length <= len(self._existing) and (
+                self._existing[offset : offset + length] == data
+            ):
+                self.unchanged += 1
+                return
+        self._file.write(data)
+        self.entries[key] = (self._size, len(data))
+        self._size += len(data)
+        self.written += 1
+
+    def remove(self, point_ids):
+        for point_id in point_ids:
+            self.entries.pop(_key(point_id), None)
+
+    def commit(self, prune=False):
+        # prune=True drops every text that wasn't put() since the writer was opened
+        if prune:
+            self.entries = {k: v for k, v in self.entries.items() if k in self._touched}
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self.generation += 1
+        live = sum(length for _, length in self.entries.values())
+        if self._size and live < self._size * (1 - self.compact_ratio):
+            self._compact()
+
+        keys = sorted(self.entries)
+        index = np.empty(len(keys), dtype=INDEX_DTYPE)
+        index["key"] = keys
+        index["offset"] = [self.entries[k][0] for k in keys]
+        index["length"] = [self.entries[k][1] for k in keys]
+        index_name = f"index.{self.generation}.npy"
+        np.save(os.path.join(self.path, index_name), index)
+
+        manifest = {
+            "blob": self.blob_name,
+            "index": index_name,
+            "generation": self.generation,
+            "count": len(keys),
+        }
+        tmp_path = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST))
+        self._remove_stale({self.blob_name, index_name})
+
+        logger.info(
+            f"Text store {self.path}: {len(keys)} texts "
+            f"({self.written} written, {self.unchanged} unchanged, {self._size / 2**20:.1f} MB blob)"
+        )
+
+    def _compact(self):
+        old_blob = _map(os.path.join(self.path, self.blob_name))
+        self._file.close()
+        self.blob_name = f"texts.{self.generation}.bin"
+        with open(os.path.join(self.path, self.blob_name), "wb") as f:
+            size = 0
+            for key, (offset, length) in self.entries.items():
+                f.write(old_blob[offset : offset + length])
+                self.entries[key] = (size, length)
+                size += length
+            f.flush()
+            os.fsync(f.fileno())
+        logger.info(f"Compacted text store {self.path}: {self._size} -> {size} bytes")
+        self._size = size
+        self._file = open(os.path.join(self.path, self.blob_name), "ab")
+        # Offsets now point into the new blob; compare later puts against it
+        self._existing = _map(os.path.join(self.path, self.blob_name)) if size else b""
+
+    def _remove_stale(self, keep):
+        # Readers that still map an old file keep working on POSIX; where the
+        # OS refuses to delete an open file it is left for the next commit
+        for name in os.listdir(self.path):
+            if name.startswith(("index.", "texts.")) and name not in keep:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def open_text_store(collection_name, root=TEXT_STORE_DIR, refresh_seconds=30):
+    path = text_store_path(collection_name, root)
+    if not os.path.exists(os.path.join(path, MANIFEST)):
+        logger.warning(f"No text store at {path}; texts are read from the Qdrant payload")
+        return None
+    return TextStore(path, refresh_seconds=refresh_seconds)
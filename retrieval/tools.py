@@ -1,10 +1,26 @@
 import os
-import aiohttp
+import asyncio
+import hashlib
 from dotenv import load_dotenv
 from qdrant_client.async_qdrant_client import AsyncQdrantClient
-from qdrant_client.models import SparseVector, Prefetch, FusionQuery, Fusion
+from qdrant_client.models import (
+    SparseVector,
+    Prefetch,
+    FusionQuery,
+    Fusion,
+    SearchParams,
+    QuantizationSearchParams,
+    Filter,
+    FieldCondition,
+    MatchAny,
+    DatetimeRange,
+    QueryRequest,
+)
 from sentence_transformers import SentenceTransformer
 from fastembed import SparseTextEmbedding
+from retrieval.executor import run_inference
+from retrieval.batching import BatchingEncoder, BatchingReranker
+from retrieval.http_client import get_http_session
 from logger import auto_logger
 
 # Load environment variables
@@ -13,15 +29,91 @@ QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
 HF_TOKEN = os.getenv("HF_TOKEN")
 
+LAWS_COLLECTION = "bge-laws-2048-chunks"
+CASES_COLLECTION = "bge-cases-2048-chunks"
+
+# Payload fields with keyword/datetime indexes (created by ingestion/load_to_qdrant.py)
+LAW_CODE_FIELD = "metadata.law_code"
+CASE_CODE_FIELD = "metadata.metadata.case_code"
+CASE_TYPE_FIELD = "metadata.metadata.case_type"
+DATE_FIELD = "date"
+
+# Candidates are fetched with just what reranking needs; the remaining fields
+# are retrieved afterwards for the few documents that survive
+LAW_RERANK_FIELDS = ["text", "content_hash"]
+LAW_DETAIL_FIELDS = ["metadata.url"]
+CASE_RERANK_FIELDS = ["text", "content_hash", "metadata.metadata.case_no"]
+CASE_DETAIL_FIELDS = ["metadata.metadata.case_url", "metadata.metadata.operative"]
+
 
 def get_qdrant_client():
     return AsyncQdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
 
 
+def build_filter(
+    law_codes=None, case_codes=None, case_types=None, date_from=None, date_to=None
+):
+    # e.g. build_filter(case_codes=["КоАП РФ"]); dates are "YYYY-MM-DD"
+    must = []
+    for key, values in [
+        (LAW_CODE_FIELD, law_codes),
+        (CASE_CODE_FIELD, case_codes),
+        (CASE_TYPE_FIELD, case_types),
+    ]:
+        if values:
+            must.append(FieldCondition(key=key, match=MatchAny(any=list(values))))
+    if date_from or date_to:
+        must.append(
+            FieldCondition(key=DATE_FIELD, range=DatetimeRange(gte=date_from, lte=date_to))
+        )
+    return Filter(must=must) if must else None
+
+
+def cache_kind(kind, inference_backend, query_filter=None):
+    # Filtered results are cached separately from unfiltered ones
+    key = f"{kind}:{inference_backend}"
+    if query_filter is not None:
+        digest = hashlib.sha1(query_filter.model_dump_json().encode("utf-8")).hexdigest()
+        key += f":{digest[:12]}"
+    return key
+
+
+def build_search_params(search_config=None):
+    # `search:` config block -> Qdrant SearchParams. rescore/oversampling only
+    # take effect on collections created with quantization.
+    if not search_config:
+        return None
+    quantization = None
+    if "rescore" in search_config or "oversampling" in search_config:
+        quantization = QuantizationSearchParams(
+            rescore=search_config.get("rescore", True),
+            oversampling=search_config.get("oversampling"),
+        )
+    return SearchParams(
+        hnsw_ef=search_config.get("hnsw_ef"),
+        exact=search_config.get("exact", False),
+        quantization=quantization,
+    )
+
+
 @auto_logger
-def load_dense_model(model_name: str, logger=None):
+def load_dense_model(
+    model_name: str,
+    batching: bool = False,
+    max_batch_size: int = 16,
+    max_wait_ms: float = 5,
+    logger=None,
+):
     logger.info(f"Loading dense model: {model_name}")
-    return SentenceTransformer(model_name, trust_remote_code=True)
+    model = SentenceTransformer(model_name, trust_remote_code=True)
+    if batching:
+        logger.info(
+            f"Micro-batching enabled: max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms}"
+        )
+        return BatchingEncoder(
+            model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+        )
+    return model
 
 
 @auto_logger
@@ -30,6 +122,40 @@ def load_sparse_model(model_name="Qdrant/bm25", logger=None):
     return SparseTextEmbedding(model_name=model_name)
 
 
+async def encode_dense(dense_model, text):
+    if isinstance(dense_model, BatchingEncoder):
+        return await dense_model.encode_async(text)
+    return await run_inference(dense_model.encode, text, normalize_embeddings=True)
+
+
+async def rerank_scores(reranker, pairs):
+    if isinstance(reranker, BatchingReranker):
+        return await reranker.predict_async(pairs)
+    return await run_inference(reranker.predict, pairs)
+
+
+async def score_documents(query, docs, reranker, score_cache=None):
+    # Only pairs without a cached score are sent to the reranker
+    scores = [None] * len(docs)
+    if score_cache is not None:
+        scores = [score_cache.get(query, doc.get("id")) for doc in docs]
+
+    missing = [i for i, score in enumerate(scores) if score is None]
+    if missing:
+        new_scores = await rerank_scores(
+            reranker, [(query, docs[i]["text"]) for i in missing]
+        )
+        for i, score in zip(missing, new_scores):
+            scores[i] = score
+            if score_cache is not None:
+                score_cache.set(query, docs[i].get("id"), score)
+    return scores
+
+
+def embed_sparse(sparse_model, text):
+    return list(sparse_model.embed([text]))[0]
+
+
 async def remote_encode_hf(query, model_name, hf_token):
     headers = {"Authorization": f"Bearer {hf_token}"}
     payload = {"inputs": query}
@@ -37,11 +163,11 @@ async def remote_encode_hf(query, model_name, hf_token):
         f"https://api-inference.huggingface.co/pipeline/feature-extraction/{model_name}"
     )
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=payload) as response:
-            response.raise_for_status()
-            vector = await response.json()
-            return [float(sum(col) / len(col)) for col in zip(*vector)]
+    session = get_http_session()
+    async with session.post(url, headers=headers, json=payload) as response:
+        response.raise_for_status()
+        vector = await response.json()
+        return [float(sum(col) / len(col)) for col in zip(*vector)]
 
 
 async def remote_rerank_hf(query, docs, model_name, hf_token, top_k=5):
@@ -49,16 +175,16 @@ async def remote_rerank_hf(query, docs, model_name, hf_token, top_k=5):
     inputs = [{"query": query, "documents": [doc["text"] for doc in docs]}]
     url = f"https://api-inference.huggingface.co/models/{model_name}"
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=inputs) as response:
-            response.raise_for_status()
-            scores = await response.json()
-            if isinstance(scores, list) and "scores" in scores[0]:
-                sorted_indices = sorted(
-                    enumerate(scores[0]["scores"]), key=lambda x: x[1], reverse=True
-                )
-                return [docs[i] for i, _ in sorted_indices[:top_k]]
-            return docs[:top_k]
+    session = get_http_session()
+    async with session.post(url, headers=headers, json=inputs) as response:
+        response.raise_for_status()
+        scores = await response.json()
+        if isinstance(scores, list) and "scores" in scores[0]:
+            sorted_indices = sorted(
+                enumerate(scores[0]["scores"]), key=lambda x: x[1], reverse=True
+            )
+            return [docs[i] for i, _ in sorted_indices[:top_k]]
+        return docs[:top_k]
 
 
 @auto_logger
@@ -70,6 +196,9 @@ async def search_qdrant(
     retriever_type: str = "dense",
     dense_model=None,
     sparse_model=None,
+    search_params=None,
+    query_filter=None,
+    with_payload=True,
     logger=None,
 ):
     if retriever_type not in {"dense", "sparse", "hybrid"}:
@@ -81,12 +210,12 @@ async def search_qdrant(
     if retriever_type in {"dense", "hybrid"}:
         if dense_model is None:
             raise ValueError("Dense model is required for dense or hybrid search.")
-        dense_vector = dense_model.encode(query_text, normalize_embeddings=True)
+        dense_vector = await encode_dense(dense_model, query_text)
 
     if retriever_type in {"sparse", "hybrid"}:
         if sparse_model is None:
             raise ValueError("Sparse model is required for sparse or hybrid search.")
-        sparse_embed = list(sparse_model.embed([query_text]))[0]
+        sparse_embed = await run_inference(embed_sparse, sparse_model, query_text)
         sparse_vector = SparseVector(
             indices=sparse_embed.indices, values=sparse_embed.values
         )
@@ -97,7 +226,9 @@ async def search_qdrant(
             query=dense_vector,
             using="dense",
             limit=top_k,
-            with_payload=True,
+            with_payload=with_payload,
+            search_params=search_params,
+            query_filter=query_filter,
         )
     elif retriever_type == "sparse":
         return await client.query_points(
@@ -105,18 +236,26 @@ async def search_qdrant(
             query=sparse_vector,
             using="sparse",
             limit=top_k,
-            with_payload=True,
+            with_payload=with_payload,
+            query_filter=query_filter,
         )
     else:
         return await client.query_points(
             collection_name=collection_name,
             query=FusionQuery(fusion=Fusion.RRF),
             prefetch=[
-                Prefetch(query=dense_vector, using="dense", limit=20),
-                Prefetch(query=sparse_vector, using="sparse", limit=20),
+                Prefetch(
+                    query=dense_vector,
+                    using="dense",
+                    limit=20,
+                    params=search_params,
+                    filter=query_filter,
+                ),
+                Prefetch(query=sparse_vector, using="sparse", limit=20, filter=query_filter),
             ],
             limit=top_k,
-            with_payload=True,
+            with_payload=with_payload,
+            query_filter=query_filter,
         )
 
 
@@ -128,6 +267,9 @@ async def search_with_precomputed_vectors(
     retriever_type: str = "dense",
     dense_vector=None,
     sparse_vector=None,
+    search_params=None,
+    query_filter=None,
+    with_payload=True,
     logger=None,
 ):
     if retriever_type == "dense":
@@ -138,7 +280,9 @@ async def search_with_precomputed_vectors(
             query=dense_vector,
             using="dense",
             limit=top_k,
-            with_payload=True,
+            with_payload=with_payload,
+            search_params=search_params,
+            query_filter=query_filter,
         )
     elif retriever_type == "sparse":
         if sparse_vector is None:
@@ -148,7 +292,8 @@ async def search_with_precomputed_vectors(
             query=sparse_vector,
             using="sparse",
             limit=top_k,
-            with_payload=True,
+            with_payload=with_payload,
+            query_filter=query_filter,
         )
     elif retriever_type == "hybrid":
         if dense_vector is None or sparse_vector is None:
@@ -159,33 +304,217 @@ async def search_with_precomputed_vectors(
             collection_name=collection_name,
             query=FusionQuery(fusion=Fusion.RRF),
             prefetch=[
-                Prefetch(query=dense_vector, using="dense", limit=20),
-                Prefetch(query=sparse_vector, using="sparse", limit=20),
+                Prefetch(
+                    query=dense_vector,
+                    using="dense",
+                    limit=20,
+                    params=search_params,
+                    filter=query_filter,
+                ),
+                Prefetch(query=sparse_vector, using="sparse", limit=20, filter=query_filter),
             ],
             limit=top_k,
-            with_payload=True,
+            with_payload=with_payload,
+            query_filter=query_filter,
         )
     else:
         raise ValueError(f"Invalid retriever type: {retriever_type}")
 
 
+async def retrieve_points(
+    client,
+    collection_name: str,
+    query_text: str,
+    top_k: int,
+    dense_model=None,
+    dense_vector=None,
+    search_params=None,
+    query_filter=None,
+    with_payload=True,
+):
+    # Reuse an already computed query embedding when the caller has one
+    if dense_vector is not None:
+        return await search_with_precomputed_vectors(
+            client=client,
+            collection_name=collection_name,
+            top_k=top_k,
+            retriever_type="dense",
+            dense_vector=dense_vector,
+            search_params=search_params,
+            query_filter=query_filter,
+            with_payload=with_payload,
+        )
+    return await search_qdrant(
+        client=client,
+        collection_name=collection_name,
+        query_text=query_text,
+        top_k=top_k,
+        retriever_type="dense",
+        dense_model=dense_model,
+        search_params=search_params,
+        query_filter=query_filter,
+        with_payload=with_payload,
+    )
+
+
+async def query_points_batch(
+    client,
+    collection_name: str,
+    dense_vectors,
+    top_k: int,
+    search_params=None,
+    query_filter=None,
+    with_payload=True,
+):
+    # All queries in one request to Qdrant's batch query endpoint
+    requests = [
+        QueryRequest(
+            query=[float(x) for x in vector],
+            using="dense",
+            limit=top_k,
+            params=search_params,
+            filter=query_filter,
+            with_payload=with_payload,
+        )
+        for vector in dense_vectors
+    ]
+    return await client.query_batch_points(
+        collection_name=collection_name, requests=requests
+    )
+
+
+async def fetch_payloads(client, collection_name, point_ids, fields):
+    # One batched retrieve for the documents that survived reranking
+    if not point_ids:
+        return {}
+    points = await client.retrieve(
+        collection_name=collection_name,
+        ids=point_ids,
+        with_payload=fields,
+        with_vectors=False,
+    )
+    return {str(p.id): p.payload or {} for p in points}
+
+
 def match_article(pred, gold):
     return pred.get("law_code") == gold.get("law_code") and pred.get(
         "law_number"
     ) == gold.get("law_number")
 
 
-def prepare_laws_from_qdrant(points):
+def point_cache_id(point):
+    # Ids are stable across refreshes; the content hash keeps cached rerank
+    # scores from outliving an edit of the chunk behind the same id
+    content_hash = (point.payload or {}).get("content_hash")
+    return f"{point.id}:{content_hash}" if content_hash else str(point.id)
+
+
+def rerank_fields(fields, text_store=None):
+    # With a local text store Qdrant only returns ids, hashes and metadata
+    if text_store is None:
+        return fields
+    return [field for field in fields if field != "text"]
+
+
+def point_text(point, text_store=None):
+    # None when the text is neither in the store nor in the payload; such
+    # points are dropped rather than reranked and quoted as empty documents
+    if text_store is not None:
+        text = text_store.get(point.id)
+        if text is not None:
+            return text
+    return (point.payload or {}).get("text")
+
+
+@auto_logger
+def prepare_laws_from_qdrant(points, text_store=None, logger=None):
     docs = []
     for r in points:
         payload = r.payload or {}
         meta = payload.get("metadata", {})
         url = meta.get("url")
-        text = payload.get("text", "")
-        docs.append({"text": text, "url": url})
+        text = point_text(r, text_store)
+        if text is None:
+            logger.error(f"No text for law point {r.id}; is the text store in sync?")
+            continue
+        docs.append(
+            {"id": point_cache_id(r), "point_id": str(r.id), "text": text, "url": url}
+        )
     return docs
 
 
+@auto_logger
+def prepare_case_chunks_from_qdrant(points, text_store=None, logger=None):
+    chunks = []
+    for r in points:
+        payload = r.payload or {}
+        meta = payload.get("metadata", {}).get("metadata", {})
+        case_no = meta.get("case_no")
+        if not case_no:
+            continue
+        text = point_text(r, text_store)
+        if text is None:
+            logger.error(f"No text for case point {r.id}; is the text store in sync?")
+            continue
+
+        chunks.append(
+            {
+                "id": point_cache_id(r),
+                "point_id": str(r.id),
+                "text": text,
+                "case_no": case_no,
+            }
+        )
+    return chunks
+
+
+def top_by_score(docs, scores, top_k=5):
+    return [
+        doc for doc, _ in sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
+    ][:top_k]
+
+
+def format_law_docs(docs, details):
+    for doc in docs:
+        doc["url"] = details.get(doc["point_id"], {}).get("metadata", {}).get("url")
+        doc["text"] = f"[Ссылка на закон]({doc['url']})\nНазвание и текст источника: {doc['text']}"
+    return docs
+
+
+def group_case_chunks(reranked_chunks, max_cases=2):
+    # Chunks of the best max_cases decisions, in rerank order
+    grouped = {}
+    for chunk in reranked_chunks:
+        case_no = chunk["case_no"]
+        if case_no not in grouped:
+            if len(grouped) == max_cases:
+                continue
+            grouped[case_no] = {
+                "case_no": case_no,
+                "point_id": chunk["point_id"],
+                "chunks": [],
+            }
+        grouped[case_no]["chunks"].append(chunk["text"])
+    return list(grouped.values())
+
+
+def format_case_docs(grouped, details):
+    final_docs = []
+    for case in grouped:
+        meta = details.get(case["point_id"], {}).get("metadata", {}).get("metadata", {})
+        case_url = meta.get("case_url")
+        full_text = "\n".join(case["chunks"])
+        full_text = f"[Ссылка на судебное решение]({case_url})\nЧасть фабулы:{full_text.strip()}\nРезолютивная часть:{meta.get('operative', '')}"
+        final_docs.append(
+            {
+                "text": full_text,
+                "case_url": case_url,
+                "case_no": case["case_no"],
+            }
+        )
+    return final_docs
+
+
 @auto_logger
 async def get_reranked_law_articles(
     query,
@@ -194,32 +523,59 @@ async def get_reranked_law_articles(
     client,
     inference_backend="local",
     remote_reranker_model=None,
+    dense_vector=None,
+    cache=None,
+    semantic_cache=None,
+    score_cache=None,
+    search_params=None,
+    query_filter=None,
+    text_store=None,
     logger=None,
 ):
-    res = await search_qdrant(
+    kind = cache_kind("laws", inference_backend, query_filter)
+    if cache is not None:
+        cached = cache.get(kind, LAWS_COLLECTION, query)
+        if cached is not None:
+            return cached
+
+    if semantic_cache is not None:
+        if dense_vector is None:
+            dense_vector = await encode_dense(embedder, query)
+        cached = semantic_cache.lookup(kind, LAWS_COLLECTION, dense_vector)
+        if cached is not None:
+            logger.info(f"Semantic cache hit for laws query: {query[:60]}")
+            return cached
+
+    res = await retrieve_points(
         client=client,
-        collection_name="bge-laws-2048-chunks",
+        collection_name=LAWS_COLLECTION,
         query_text=query,
         top_k=10,
-        retriever_type="dense",
         dense_model=embedder,
+        dense_vector=dense_vector,
+        search_params=search_params,
+        query_filter=query_filter,
+        with_payload=rerank_fields(LAW_RERANK_FIELDS, text_store),
     )
-    docs = prepare_laws_from_qdrant(res.points)
+    docs = prepare_laws_from_qdrant(res.points, text_store)
 
     if inference_backend == "remote":
         reranked = await remote_rerank_hf(
             query, docs, remote_reranker_model, HF_TOKEN, top_k=5
         )
     else:
-        reranked = reranker.predict([(query, doc["text"]) for doc in docs])
-        reranked = [
-            doc
-            for doc, _ in sorted(zip(docs, reranked), key=lambda x: x[1], reverse=True)
-        ][:5]
-
-    for doc in reranked:
-        if "url" in doc:
-            doc["text"] = f"[Ссылка на закон]({doc['url']})\nНазвание и текст источника: {doc['text']}"
+        scores = await score_documents(query, docs, reranker, score_cache)
+        reranked = top_by_score(docs, scores)
+
+    details = await fetch_payloads(
+        client, LAWS_COLLECTION, [doc["point_id"] for doc in reranked], LAW_DETAIL_FIELDS
+    )
+    format_law_docs(reranked, details)
+
+    if cache is not None:
+        cache.set(kind, LAWS_COLLECTION, query, reranked)
+    if semantic_cache is not None:
+        semantic_cache.add(kind, LAWS_COLLECTION, dense_vector, reranked)
     return reranked
 
 
@@ -231,69 +587,217 @@ async def get_reranked_case_chunks(
     client,
     inference_backend="local",
     remote_reranker_model=None,
+    dense_vector=None,
+    cache=None,
+    semantic_cache=None,
+    score_cache=None,
+    search_params=None,
+    query_filter=None,
+    text_store=None,
     logger=None,
 ):
-    res = await search_qdrant(
+    kind = cache_kind("cases", inference_backend, query_filter)
+    if cache is not None:
+        cached = cache.get(kind, CASES_COLLECTION, query)
+        if cached is not None:
+            return cached
+
+    if semantic_cache is not None:
+        if dense_vector is None:
+            dense_vector = await encode_dense(embedder, query)
+        cached = semantic_cache.lookup(kind, CASES_COLLECTION, dense_vector)
+        if cached is not None:
+            logger.info(f"Semantic cache hit for cases query: {query[:60]}")
+            return cached
+
+    res = await retrieve_points(
         client=client,
-        collection_name="bge-cases-2048-chunks",
+        collection_name=CASES_COLLECTION,
         query_text=query,
         top_k=5,
-        retriever_type="dense",
-        dense_model=embedder        
+        dense_model=embedder,
+        dense_vector=dense_vector,
+        search_params=search_params,
+        query_filter=query_filter,
+        with_payload=rerank_fields(CASE_RERANK_FIELDS, text_store),
     )
 
-    raw_chunks = []
-    for r in res.points:
-        payload = r.payload or {}
-        meta = payload.get("metadata", {}).get("metadata", {})
-        case_no = meta.get("case_no")
-        if not case_no:
-            continue
-
-        raw_chunks.append(
-            {
-                "text": payload.get("text", ""),
-                "case_no": case_no,
-                "case_url": meta.get("case_url"),
-                "operative": meta.get("operative", ""),
-            }
-        )
+    raw_chunks = prepare_case_chunks_from_qdrant(res.points, text_store)
 
     if inference_backend == "remote":
         reranked_chunks = await remote_rerank_hf(
             query, raw_chunks, remote_reranker_model, HF_TOKEN, top_k=5
         )
     else:
-        scores = reranker.predict([(query, doc["text"]) for doc in raw_chunks])
-        reranked_chunks = [
-            doc
-            for doc, _ in sorted(
-                zip(raw_chunks, scores), key=lambda x: x[1], reverse=True
-            )
-        ][:5]
+        scores = await score_documents(query, raw_chunks, reranker, score_cache)
+        reranked_chunks = top_by_score(raw_chunks, scores)
+
+    grouped = group_case_chunks(reranked_chunks)
+    # case_url and the (long) operative part only for the cases that are returned
+    details = await fetch_payloads(
+        client,
+        CASES_COLLECTION,
+        [case["point_id"] for case in grouped],
+        CASE_DETAIL_FIELDS,
+    )
+    final_docs = format_case_docs(grouped, details)
+    if cache is not None:
+        cache.set(kind, CASES_COLLECTION, query, final_docs)
+    if semantic_cache is not None:
+        semantic_cache.add(kind, CASES_COLLECTION, dense_vector, final_docs)
+    return final_docs
 
-    grouped = {}
-    for chunk in reranked_chunks:
-        case_no = chunk["case_no"]
-        if case_no not in grouped:
-            grouped[case_no] = {
-                "case_no": case_no,
-                "case_url": chunk["case_url"],
-                "operative": chunk.get("operative", ""),
-                "chunks": [],
-            }
-        grouped[case_no]["chunks"].append(chunk["text"])
 
-    final_docs = []
-    for case in grouped.values():
-        full_text = "\n".join(case["chunks"])
-        full_text = f"[Ссылка на судебное решение]({case['case_url']})\nЧасть фабулы:{full_text.strip()}\nРезолютивная часть:{case['operative']}"
-        final_docs.append(
-            {
-                "text": full_text,
-                "case_url": case["case_url"],
-                "case_no": case["case_no"],
-            }
+@auto_logger
+async def get_reranked_context(
+    query,
+    embedder,
+    reranker,
+    client,
+    inference_backend="local",
+    remote_reranker_model=None,
+    cache=None,
+    semantic_cache=None,
+    score_cache=None,
+    search_params=None,
+    law_filter=None,
+    case_filter=None,
+    law_text_store=None,
+    case_text_store=None,
+    logger=None,
+):
+    # Skip embedding entirely when both result sets are already cached
+    if (
+        cache is not None
+        and cache.contains(
+            cache_kind("laws", inference_backend, law_filter), LAWS_COLLECTION, query
+        )
+        and cache.contains(
+            cache_kind("cases", inference_backend, case_filter), CASES_COLLECTION, query
         )
+    ):
+        dense_vector = None
+    else:
+        # Embed the question once and fan out law and case retrieval concurrently
+        dense_vector = await encode_dense(embedder, query)
+
+    law_docs, case_docs = await asyncio.gather(
+        get_reranked_law_articles(
+            query=query,
+            embedder=embedder,
+            reranker=reranker,
+            client=client,
+            inference_backend=inference_backend,
+            remote_reranker_model=remote_reranker_model,
+            dense_vector=dense_vector,
+            cache=cache,
+            semantic_cache=semantic_cache,
+            score_cache=score_cache,
+            search_params=search_params,
+            query_filter=law_filter,
+            text_store=law_text_store,
+        ),
+        get_reranked_case_chunks(
+            query=query,
+            embedder=embedder,
+            reranker=reranker,
+            client=client,
+            inference_backend=inference_backend,
+            remote_reranker_model=remote_reranker_model,
+            dense_vector=dense_vector,
+            cache=cache,
+            semantic_cache=semantic_cache,
+            score_cache=score_cache,
+            search_params=search_params,
+            query_filter=case_filter,
+            text_store=case_text_store,
+        ),
+    )
+    logger.info(f"Retrieved {len(law_docs)} law docs and {len(case_docs)} case docs")
+    return law_docs, case_docs
 
-    return final_docs[:2]
+
+@auto_logger
+async def get_reranked_context_batch(
+    queries,
+    embedder,
+    reranker,
+    client,
+    search_params=None,
+    law_filter=None,
+    case_filter=None,
+    law_text_store=None,
+    case_text_store=None,
+    logger=None,
+):
+    # Offline counterpart of get_reranked_context for many questions: one
+    # encode call, one batch query per collection and one rerank run over the
+    # pairs of all questions. Local inference only; caches are not consulted.
+    queries = list(queries)
+    if not queries:
+        return []
+
+    dense_vectors = await run_inference(
+        embedder.encode, queries, batch_size=len(queries), normalize_embeddings=True
+    )
+    law_results, case_results = await asyncio.gather(
+        query_points_batch(
+            client,
+            LAWS_COLLECTION,
+            dense_vectors,
+            top_k=10,
+            search_params=search_params,
+            query_filter=law_filter,
+            with_payload=rerank_fields(LAW_RERANK_FIELDS, law_text_store),
+        ),
+        query_points_batch(
+            client,
+            CASES_COLLECTION,
+            dense_vectors,
+            top_k=5,
+            search_params=search_params,
+            query_filter=case_filter,
+            with_payload=rerank_fields(CASE_RERANK_FIELDS, case_text_store),
+        ),
+    )
+    law_docs = [prepare_laws_from_qdrant(r.points, law_text_store) for r in law_results]
+    case_chunks = [
+        prepare_case_chunks_from_qdrant(r.points, case_text_store) for r in case_results
+    ]
+
+    pairs = [
+        (query, doc["text"])
+        for query, docs in zip(queries, law_docs)
+        for doc in docs
+    ] + [
+        (query, chunk["text"])
+        for query, chunks in zip(queries, case_chunks)
+        for chunk in chunks
+    ]
+    scores = iter(await rerank_scores(reranker, pairs))
+    reranked_laws = [top_by_score(docs, [next(scores) for _ in docs]) for docs in law_docs]
+    grouped_cases = [
+        group_case_chunks(top_by_score(chunks, [next(scores) for _ in chunks]))
+        for chunks in case_chunks
+    ]
+
+    law_details, case_details = await asyncio.gather(
+        fetch_payloads(
+            client,
+            LAWS_COLLECTION,
+            list({doc["point_id"] for docs in reranked_laws for doc in docs}),
+            LAW_DETAIL_FIELDS,
+        ),
+        fetch_payloads(
+            client,
+            CASES_COLLECTION,
+            list({case["point_id"] for cases in grouped_cases for case in cases}),
+            CASE_DETAIL_FIELDS,
+        ),
+    )
+    results = [
+        (format_law_docs(docs, law_details), format_case_docs(cases, case_details))
+        for docs, cases in zip(reranked_laws, grouped_cases)
+    ]
+    logger.info(f"Retrieved context for {len(queries)} questions ({len(pairs)} rerank pairs)")
+    return results
@@ -0,0 +1,170 @@
+import asyncio
+
+from bot.admission import AdmissionController
+
+
+class Recorder:
+    # Handler that blocks until released and records what it answered
+
+    def __init__(self):
+        self.handled = []
+        self.active = 0
+        self.max_active = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, message, wait_msg):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await self.release.wait()
+        self.handled.append(message)
+        self.active -= 1
+
+
+def make_controller(notify_delay=0, **kwargs):
+    handler = Recorder()
+    notices = []
+
+    async def notify(wait_msg, text):
+        await asyncio.sleep(notify_delay)
+        notices.append((wait_msg, text))
+
+    kwargs.setdefault("position_interval", 0)
+    return AdmissionController(handler, notify, **kwargs), handler, notices
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def drain(controller):
+    await asyncio.gather(*list(controller._tasks.values()))
+
+
+def test_limits_concurrent_requests():
+    async def scenario():
+        controller, handler, notices = make_controller(max_concurrent=2)
+        for user_id in range(5):
+            assert await controller.submit(user_id, f"m{user_id}", f"w{user_id}")
+        await settle()
+
+        assert handler.active == 2
+        assert controller.stats()["queued"] == 3
+        handler.release.set()
+        await drain(controller)
+
+        assert handler.max_active == 2
+        assert sorted(handler.handled) == [f"m{i}" for i in range(5)]
+        assert controller.stats()["running"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_reports_queue_positions():
+    async def scenario():
+        controller, handler, notices = make_controller(max_concurrent=1)
+        for user_id in range(3):
+            await controller.submit(user_id, f"m{user_id}", f"w{user_id}")
+        await settle()
+
+        positions = {wait_msg: text.rsplit(" ", 1)[-1] for wait_msg, text in notices}
+        assert positions == {"w1": "1", "w2": "2"}
+        handler.release.set()
+        await drain(controller)
+
+    asyncio.run(scenario())
+
+
+def test_coalesces_messages_from_one_user():
+    async def scenario():
+        controller, handler, notices = make_controller(max_concurrent=1)
+        await controller.submit(1, "first", "w1")
+        await settle()
+        # Sent while the first one is running: only the newest is answered
+        await controller.submit(1, "second", "w2")
+        await controller.submit(1, "third", "w3")
+        handler.release.set()
+        await drain(controller)
+
+        assert handler.handled == ["first", "third"]
+        assert controller.stats()["coalesced"] == 2
+        assert "w2" in [wait_msg for wait_msg, _ in notices]
+
+    asyncio.run(scenario())
+
+
+def test_sheds_new_users_when_queue_is_full():
+    async def scenario():
+        controller, handler, notices = make_controller(max_concurrent=1, max_queue=1)
+        assert await controller.submit(1, "m1", "w1")
+        await settle()
+        assert await controller.submit(2, "m2", "w2")
+        assert not await controller.submit(3, "m3", "w3")
+
+        assert controller.stats()["shed"] == 1
+        assert notices[-1][0] == "w3"
+        handler.release.set()
+        await drain(controller)
+        assert handler.handled == ["m1", "m2"]
+
+    asyncio.run(scenario())
+
+
+def test_failed_request_frees_its_slot():
+    async def scenario():
+        answered = []
+
+        async def handler(message, wait_msg):
+            if message == "boom":
+                raise RuntimeError("handler failed")
+            answered.append(message)
+
+        async def notify(wait_msg, text):
+            pass
+
+        controller = AdmissionController(handler, notify, max_concurrent=1)
+        await controller.submit(1, "boom", "w1")
+        await controller.submit(2, "ok", "w2")
+        await drain(controller)
+
+        assert answered == ["ok"]
+        assert controller.stats()["running"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_slow_notify_does_not_delay_handler():
+    async def scenario():
+        controller, handler, notices = make_controller(
+            notify_delay=1.0, max_concurrent=1, position_interval=5
+        )
+        handler.release.set()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for user_id in range(5):
+            await controller.submit(user_id, f"m{user_id}", f"w{user_id}")
+        await drain(controller)
+
+        # Every request ran although no queue position edit has finished yet
+        assert loop.time() - start < 0.5
+        assert sorted(handler.handled) == [f"m{i}" for i in range(5)]
+        assert notices == []
+
+    asyncio.run(scenario())
+
+
+def test_position_updates_are_coalesced():
+    async def scenario():
+        controller, handler, notices = make_controller(max_concurrent=1, position_interval=0.05)
+        for user_id in range(6):
+            await controller.submit(user_id, f"m{user_id}", f"w{user_id}")
+        await settle()
+        first_round = len(notices)
+        await asyncio.sleep(0.1)
+
+        # One edit per waiting user, not one per queue change
+        assert first_round == len(notices) == 5
+        handler.release.set()
+        await drain(controller)
+
+    asyncio.run(scenario())
@@ -0,0 +1,194 @@
+import numpy as np
+import pytest
+
+from retrieval import cache as cache_module
+from retrieval.cache import (
+    RetrievalCache,
+    SemanticCache,
+    ScoreCache,
+    invalidate_collection_cache,
+)
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def test_retrieval_cache_normalizes_queries():
+    cache = RetrievalCache()
+    cache.set("laws", "c", "Что такое  ГК РФ?", [{"text": "a"}])
+
+    assert cache.get("laws", "c", "что такое гк рф") == [{"text": "a"}]
+    assert cache.get("cases", "c", "что такое гк рф") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_retrieval_cache_returns_copies():
+    cache = RetrievalCache()
+    cache.set("laws", "c", "q", [{"text": "a"}])
+    cache.get("laws", "c", "q")[0]["text"] = "changed"
+
+    assert cache.get("laws", "c", "q") == [{"text": "a"}]
+
+
+def test_retrieval_cache_evicts_least_recently_used():
+    cache = RetrievalCache(max_entries=2)
+    cache.set("laws", "c", "a", 1)
+    cache.set("laws", "c", "b", 2)
+    cache.get("laws", "c", "a")
+    cache.set("laws", "c", "c", 3)
+
+    assert cache.get("laws", "c", "a") == 1
+    assert cache.get("laws", "c", "b") is None
+    assert cache.get("laws", "c", "c") == 3
+
+
+def test_retrieval_cache_expires_entries(clock):
+    cache = RetrievalCache(ttl_seconds=60)
+    cache.set("laws", "c", "q", 1)
+
+    clock.now += 59
+    assert cache.get("laws", "c", "q") == 1
+    clock.now += 2
+    assert cache.get("laws", "c", "q") is None
+
+
+def test_retrieval_cache_persists_to_sqlite(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    RetrievalCache(db_path=db_path).set("laws", "c", "q", [{"text": "a"}])
+
+    restarted = RetrievalCache(db_path=db_path)
+    assert restarted.get("laws", "c", "q") == [{"text": "a"}]
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_invalidation_drops_entries_of_one_collection(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = RetrievalCache(db_path=db_path, generation_refresh_seconds=0)
+    cache.set("laws", "laws", "q", 1)
+    cache.set("cases", "cases", "q", 2)
+
+    # Ingestion runs in another process and only shares the file
+    invalidate_collection_cache("laws", db_path)
+
+    assert cache.get("laws", "laws", "q") is None
+    assert cache.get("cases", "cases", "q") == 2
+    assert RetrievalCache(db_path=db_path).get("laws", "laws", "q") is None
+
+
+def test_invalidate_without_sqlite():
+    cache = RetrievalCache()
+    cache.set("laws", "c", "q", 1)
+    cache.invalidate("c")
+
+    assert cache.get("laws", "c", "q") is None
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_semantic_cache_threshold():
+    cache = SemanticCache(threshold=0.95)
+    cache.add("laws", "c", unit(1, 0, 0), ["docs"])
+
+    assert cache.lookup("laws", "c", unit(1, 0.1, 0)) == ["docs"]
+    assert cache.lookup("laws", "c", unit(1, 1, 0)) is None
+    assert cache.lookup("cases", "c", unit(1, 0, 0)) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.333}
+
+
+def test_semantic_cache_returns_nearest_entry():
+    cache = SemanticCache(threshold=0.9)
+    cache.add("laws", "c", unit(1, 0.3, 0), "near")
+    cache.add("laws", "c", unit(1, 0, 0), "exact")
+
+    assert cache.lookup("laws", "c", unit(1, 0, 0)) == "exact"
+
+
+def test_semantic_cache_ring_overwrites_oldest():
+    cache = SemanticCache(capacity=2, threshold=0.99)
+    cache.add("laws", "c", unit(1, 0, 0), "x")
+    cache.add("laws", "c", unit(0, 1, 0), "y")
+    cache.add("laws", "c", unit(0, 0, 1), "z")
+
+    assert cache.lookup("laws", "c", unit(1, 0, 0)) is None
+    assert cache.lookup("laws", "c", unit(0, 1, 0)) == "y"
+    assert cache.lookup("laws", "c", unit(0, 0, 1)) == "z"
+
+
+def test_semantic_cache_expires_entries(clock):
+    cache = SemanticCache(ttl_seconds=60)
+    cache.add("laws", "c", unit(1, 0, 0), "x")
+
+    clock.now += 61
+    assert cache.lookup("laws", "c", unit(1, 0, 0)) is None
+
+
+def test_semantic_cache_follows_collection_generation(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    generations = RetrievalCache(db_path=db_path, generation_refresh_seconds=0)
+    cache = SemanticCache(generations=generations)
+    cache.add("laws", "laws", unit(1, 0, 0), "x")
+
+    invalidate_collection_cache("laws", db_path)
+
+    assert cache.lookup("laws", "laws", unit(1, 0, 0)) is None
+
+
+def test_score_cache_lru_keeps_recently_read_scores():
+    cache = ScoreCache(max_entries=2, eviction="lru")
+    cache.set("q", "a", 0.1)
+    cache.set("q", "b", 0.2)
+    cache.get("q", "a")
+    cache.set("q", "c", 0.3)
+
+    assert cache.get("q", "a") == 0.1
+    assert cache.get("q", "b") is None
+    assert cache.get("q", "c") == 0.3
+
+
+def test_score_cache_fifo_evicts_oldest_write():
+    cache = ScoreCache(max_entries=2, eviction="fifo")
+    cache.set("q", "a", 0.1)
+    cache.set("q", "b", 0.2)
+    cache.get("q", "a")
+    cache.set("q", "c", 0.3)
+
+    assert cache.get("q", "a") is None
+    assert cache.get("q", "b") == 0.2
+
+
+def test_score_cache_keys_by_query_and_point():
+    cache = ScoreCache()
+    cache.set("q1", "a", 0.0)
+
+    # A zero score is a hit, not a miss
+    assert cache.get("q1", "a") == 0.0
+    assert cache.get("q2", "a") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_score_cache_ignores_points_without_id():
+    cache = ScoreCache()
+    cache.set("q", None, 0.5)
+
+    assert cache.get("q", None) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_score_cache_rejects_unknown_eviction():
+    with pytest.raises(ValueError):
+        ScoreCache(eviction="random")
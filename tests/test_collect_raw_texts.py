@@ -0,0 +1,85 @@
+import json
+import asyncio
+
+from parsing_cases.collect_raw_texts import (
+    CollectStats,
+    done_index_path,
+    failed_path,
+    load_completed_urls,
+    write_records,
+)
+
+
+def lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def record(i):
+    # Long URLs overflow a default-sized file buffer within a few hundred records
+    return {"case_url": f"https://sudact.ru/regular/doc/{i:06d}/{'x' * 100}", "raw_text": "t"}
+
+
+async def consumed(queue):
+    while not queue.empty():
+        await asyncio.sleep(0)
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_done_index_never_runs_ahead_of_output(tmp_path):
+    output_path = str(tmp_path / "case_texts.jsonl")
+
+    async def scenario():
+        queue = asyncio.Queue()
+        writer = asyncio.create_task(
+            write_records(queue, output_path, CollectStats(500), flush_every=1000, flush_seconds=60)
+        )
+        for i in range(500):
+            await queue.put(record(i))
+        await consumed(queue)
+
+        # Nothing was flushed explicitly yet, so nothing may be indexed yet
+        written = {json.loads(line)["case_url"] for line in lines(output_path)}
+        assert set(lines(done_index_path(output_path))) <= written
+
+        await queue.put(None)
+        await writer
+
+    asyncio.run(scenario())
+    assert len(lines(output_path)) == 500
+    assert lines(done_index_path(output_path)) == [record(i)["case_url"] for i in range(500)]
+
+
+def test_flushes_on_count(tmp_path):
+    output_path = str(tmp_path / "case_texts.jsonl")
+
+    async def scenario():
+        queue = asyncio.Queue()
+        writer = asyncio.create_task(
+            write_records(queue, output_path, CollectStats(5), flush_every=2, flush_seconds=60)
+        )
+        for i in range(5):
+            await queue.put(record(i))
+        await consumed(queue)
+        indexed = len(lines(done_index_path(output_path)))
+        await queue.put(None)
+        await writer
+        return indexed
+
+    assert asyncio.run(scenario()) == 4
+    assert len(lines(done_index_path(output_path))) == 5
+
+
+def test_done_index_is_rebuilt_from_output(tmp_path):
+    output_path = str(tmp_path / "case_texts.jsonl")
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(record(1)) + "\n{corrupt\n" + json.dumps(record(2)) + "\n")
+
+    expected = {record(1)["case_url"], record(2)["case_url"]}
+    assert load_completed_urls(output_path) == expected
+    assert set(lines(done_index_path(output_path))) == expected
+
+
+def test_failed_path_follows_output(tmp_path):
+    assert failed_path(str(tmp_path / "custom.jsonl")) == str(tmp_path / "custom_failed.json")
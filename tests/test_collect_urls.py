@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from parsing_cases import collect_urls
+from parsing_cases.collect_urls import dedupe_cases, extract_case_links, parse_ru_date
+from parsing_laws.crawler import Crawler
+
+
+@pytest.fixture
+def dateparser_calls(monkeypatch):
+    calls = []
+
+    def parse(raw_date, languages=None):
+        calls.append(raw_date)
+        return datetime(2020, 1, 2)
+
+    monkeypatch.setattr(collect_urls.dateparser, "parse", parse)
+    return calls
+
+
+@pytest.mark.parametrize(
+    "raw_date, expected",
+    [
+        ("5 марта 2021 г.", "05.03.2021"),
+        ("31 декабря 2019 г", "31.12.2019"),
+        ("1 мая 2020", "01.05.2020"),
+        ("  12 Сентября 2018 г. ", "12.09.2018"),
+    ],
+)
+def test_fast_path_skips_dateparser(dateparser_calls, raw_date, expected):
+    assert parse_ru_date(raw_date) == expected
+    assert dateparser_calls == []
+
+
+def test_impossible_date_is_rejected_without_fallback(dateparser_calls):
+    assert parse_ru_date("31 февраля 2019 г.") is None
+    assert dateparser_calls == []
+
+
+@pytest.mark.parametrize("raw_date", ["2021-03-05", "5 мар. 2021", "5 march 2021"])
+def test_other_formats_fall_back_to_dateparser(dateparser_calls, raw_date):
+    assert parse_ru_date(raw_date) == "02.01.2020"
+    assert dateparser_calls == [raw_date]
+
+
+def test_fallback_with_real_dateparser():
+    assert parse_ru_date("2021-03-05") == "05.03.2021"
+
+
+def case_link(number, day=5):
+    return (
+        f'<a href="/regular/doc/{number}/">Приговор № 1-{number}/2021 '
+        f"от {day} марта 2021 г. по делу</a>"
+    )
+
+
+class PagedTransport:
+    # Topic pages 1..pages list three cases each; later pages are empty
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    async def get(self, url, headers=None):
+        page = int(url.rsplit("=", 1)[1])
+        self.requested.append(page)
+        links = "".join(case_link(page * 10 + i) for i in range(3)) if page <= self.pages else ""
+        return 200, {}, f"<html>{links}</html>".encode()
+
+    async def close(self):
+        pass
+
+
+TOPIC = {
+    "case_code": "УК РФ",
+    "case_topic": "Статья 158",
+    "case_norm": "Кража",
+    "topic_url": "https://sudact.ru/practice/topic/",
+}
+
+
+def test_pagination_stops_at_first_empty_page():
+    transport = PagedTransport(pages=7)
+
+    async def scenario():
+        async with Crawler(transport, rate_per_host=1000) as crawler:
+            return await extract_case_links(crawler, TOPIC)
+
+    cases = asyncio.run(scenario())
+    assert len(cases) == 21
+    assert [case["case_no"] for case in cases[:2]] == ["1-10/2021", "1-11/2021"]
+    assert cases[0]["case_date"] == "05.03.2021"
+    # Windows of PAGE_WINDOW pages: the window holding the empty page is the last
+    assert max(transport.requested) == 2 * collect_urls.PAGE_WINDOW
+
+
+def test_duplicates_keep_the_first_topic_in_crawl_order():
+    def case(url, topic):
+        return {"case_url": url, "case_topic": topic}
+
+    sections = [
+        [[case("a", "t1"), case("b", "t1")], [case("b", "t2"), case("c", "t2")]],
+        [[case("a", "t3"), case("d", "t3")]],
+    ]
+
+    assert dedupe_cases(sections) == [
+        case("a", "t1"),
+        case("b", "t1"),
+        case("c", "t2"),
+        case("d", "t3"),
+    ]
+
+
+def test_duplicate_owner_does_not_depend_on_timing():
+    class SlowFirstTopic(PagedTransport):
+        async def get(self, url, headers=None):
+            if "/first/" in url:
+                await asyncio.sleep(0.05)
+            return await super().get(url, headers)
+
+    topics = [
+        {**TOPIC, "case_topic": "first", "topic_url": "https://sudact.ru/practice/first/"},
+        {**TOPIC, "case_topic": "second", "topic_url": "https://sudact.ru/practice/second/"},
+    ]
+
+    async def scenario():
+        async with Crawler(SlowFirstTopic(pages=2), rate_per_host=1000) as crawler:
+            return await asyncio.gather(*[extract_case_links(crawler, t) for t in topics])
+
+    unique = dedupe_cases([asyncio.run(scenario())])
+    assert len(unique) == 6
+    assert {case["case_topic"] for case in unique} == {"first"}
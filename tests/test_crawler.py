@@ -0,0 +1,157 @@
+import time
+import asyncio
+
+import pytest
+
+from parsing_laws.crawler import Crawler, TokenBucket
+
+
+class ScriptedTransport:
+    # Replays a list of responses (or exceptions) per URL; the last one repeats
+
+    def __init__(self, script=None, default=(200, {}, b"ok"), delay=0):
+        self.script = {url: list(responses) for url, responses in (script or {}).items()}
+        self.default = default
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+
+    async def get(self, url, headers=None):
+        self.requests.append((url, dict(headers or {})))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            responses = self.script.get(url) or [self.default]
+            response = responses.pop(0) if len(responses) > 1 else responses[0]
+            if isinstance(response, Exception):
+                raise response
+            return response
+        finally:
+            self.active -= 1
+
+    async def close(self):
+        pass
+
+
+def make_crawler(transport, **kwargs):
+    options = {"rate_per_host": 1000, "backoff": 0.001, "max_backoff": 0.01, **kwargs}
+    return Crawler(transport, **options)
+
+
+def test_token_bucket_allows_burst_then_paces():
+    async def scenario():
+        bucket = TokenBucket(rate=20, burst=2)
+        start = time.monotonic()
+        stamps = []
+        for _ in range(6):
+            await bucket.acquire()
+            stamps.append(time.monotonic() - start)
+        return stamps
+
+    stamps = asyncio.run(scenario())
+    assert stamps[1] < 0.03
+    # Four requests beyond the burst need four tokens at 20/sec
+    assert 0.18 <= stamps[-1] < 0.6
+
+
+def test_retries_server_errors_until_success():
+    url = "https://sudact.ru/a"
+    transport = ScriptedTransport({url: [(503, {}, b""), (500, {}, b""), (200, {}, b"body")]})
+
+    async def scenario():
+        async with make_crawler(transport) as crawler:
+            return await crawler.get_page(url), crawler.stats
+
+    page, stats = asyncio.run(scenario())
+    assert page == (b"body", True)
+    assert stats["requests"] == 3 and stats["retries"] == 2 and stats["failed"] == 0
+
+
+def test_retries_network_errors():
+    url = "https://sudact.ru/a"
+    transport = ScriptedTransport({url: [ConnectionResetError(), (200, {}, b"body")]})
+
+    async def scenario():
+        async with make_crawler(transport) as crawler:
+            return await crawler.fetch(url)
+
+    assert asyncio.run(scenario()) == (200, {}, b"body")
+
+
+def test_gives_up_after_retries():
+    url = "https://sudact.ru/a"
+    transport = ScriptedTransport({url: [(429, {}, b"")]})
+
+    async def scenario():
+        async with make_crawler(transport, retries=2) as crawler:
+            return await crawler.get_page(url), crawler.stats
+
+    page, stats = asyncio.run(scenario())
+    assert page is None
+    assert stats["requests"] == 3 and stats["failed"] == 1
+
+
+def test_client_errors_are_not_retried():
+    url = "https://sudact.ru/a"
+    transport = ScriptedTransport({url: [(404, {}, b"")]})
+
+    async def scenario():
+        async with make_crawler(transport) as crawler:
+            return await crawler.get_page(url)
+
+    assert asyncio.run(scenario()) is None
+    assert len(transport.requests) == 1
+
+
+def test_retry_delay_backs_off_exponentially_with_jitter():
+    crawler = Crawler(ScriptedTransport(), backoff=1.0, max_backoff=60.0)
+
+    for attempt in range(4):
+        delay = crawler._retry_delay(attempt, {})
+        assert 2**attempt * 0.5 <= delay <= 2**attempt
+    assert crawler._retry_delay(10, {}) <= 60.0
+
+
+def test_retry_delay_honours_retry_after():
+    crawler = Crawler(ScriptedTransport(), max_backoff=60.0)
+
+    assert crawler._retry_delay(0, {"Retry-After": "7"}) == 7.0
+    assert crawler._retry_delay(0, {"Retry-After": "3600"}) == 60.0
+    # HTTP-date values fall back to the computed backoff
+    assert crawler._retry_delay(0, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) <= 1.0
+
+
+def test_retry_after_header_name_is_case_insensitive():
+    crawler = Crawler(ScriptedTransport(), backoff=1.0, max_backoff=60.0)
+
+    assert crawler._retry_delay(0, {"retry-after": "7"}) == 7.0
+    assert crawler._retry_delay(0, {"RETRY-AFTER": "9"}) == 9.0
+
+
+def test_bounds_concurrent_requests():
+    transport = ScriptedTransport(delay=0.01)
+    urls = [f"https://sudact.ru/{i}" for i in range(12)]
+
+    async def scenario():
+        async with make_crawler(transport, concurrency=3) as crawler:
+            return await asyncio.gather(*[crawler.get_page(url) for url in urls])
+
+    pages = asyncio.run(scenario())
+    assert all(page == (b"ok", True) for page in pages)
+    assert transport.max_active == 3
+
+
+def test_rate_limits_each_host_separately():
+    transport = ScriptedTransport()
+    urls = [f"https://{host}/{i}" for host in ("a.ru", "b.ru") for i in range(3)]
+
+    async def scenario():
+        async with make_crawler(transport, rate_per_host=10, burst=1) as crawler:
+            start = time.monotonic()
+            await asyncio.gather(*[crawler.get_page(url) for url in urls])
+            return time.monotonic() - start
+
+    # Two requests per host wait 0.1s each; hosts don't queue behind each other
+    assert 0.18 <= asyncio.run(scenario()) < 0.4
@@ -0,0 +1,85 @@
+import asyncio
+
+from parsing_laws.crawler import Crawler
+from parsing_laws.http_cache import HTTPCache
+
+URL = "https://sudact.ru/law/a"
+
+
+class ConditionalTransport:
+    # Answers 304 whenever the request carries the current ETag
+
+    def __init__(self, body=b"<p>v1</p>", etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    async def get(self, url, headers=None):
+        headers = dict(headers or {})
+        self.requests.append(headers)
+        if headers.get("If-None-Match") == self.etag:
+            return 304, {"ETag": self.etag}, b""
+        return 200, {"ETag": self.etag}, self.body
+
+    async def close(self):
+        pass
+
+
+def get_page(transport, cache):
+    async def scenario():
+        async with Crawler(transport, rate_per_host=1000, cache=cache) as crawler:
+            return await crawler.get_page(URL)
+
+    return asyncio.run(scenario())
+
+
+def test_store_reports_content_changes(tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache.sqlite"))
+
+    assert cache.store(URL, {"ETag": '"1"', "Last-Modified": "Mon"}, b"a")
+    assert cache.validators(URL) == {"If-None-Match": '"1"', "If-Modified-Since": "Mon"}
+    # Same body under new validators is not a change
+    assert not cache.store(URL, {"ETag": '"2"'}, b"a")
+    assert cache.validators(URL) == {"If-None-Match": '"2"'}
+    assert cache.store(URL, {}, b"b")
+    assert cache.load(URL) == b"b"
+    cache.close()
+
+
+def test_not_modified_is_served_from_cache(tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache.sqlite"))
+    transport = ConditionalTransport()
+
+    assert get_page(transport, cache) == (b"<p>v1</p>", True)
+    assert get_page(transport, cache) == (b"<p>v1</p>", False)
+    assert transport.requests[-1]["If-None-Match"] == '"v1"'
+
+    transport.body, transport.etag = b"<p>v2</p>", '"v2"'
+    assert get_page(transport, cache) == (b"<p>v2</p>", True)
+    cache.close()
+
+
+def test_cache_survives_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    transport = ConditionalTransport()
+    cache = HTTPCache(path)
+    get_page(transport, cache)
+    cache.close()
+
+    reopened = HTTPCache(path)
+    assert get_page(transport, reopened) == (b"<p>v1</p>", False)
+    reopened.close()
+
+
+def test_304_without_cached_body_refetches(tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache.sqlite"))
+    transport = ConditionalTransport()
+    get_page(transport, cache)
+    cache._conn.execute("DELETE FROM pages")
+    # Validators still come from somewhere (e.g. a stale row); the body is gone
+    cache.validators = lambda url: {"If-None-Match": '"v1"'}
+
+    assert get_page(transport, cache) == (b"<p>v1</p>", True)
+    assert "If-None-Match" not in transport.requests[-1]
+    assert cache.load(URL) == b"<p>v1</p>"
+    cache.close()
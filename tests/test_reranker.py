@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("transformers")
+
+from retrieval import reranker as reranker_module
+from retrieval.reranker import ONNXReranker
+
+
+class FakeTokenizer:
+    # One token per character, so a pair's length is len(query) + len(doc)
+
+    def __call__(self, queries, docs, truncation=True, max_length=None):
+        ids = [[ord(c) for c in q + d][:max_length] for q, d in zip(queries, docs)]
+        return {"input_ids": ids, "attention_mask": [[1] * len(i) for i in ids]}
+
+    def pad(self, encoded, padding=True, return_tensors=None):
+        width = max(len(ids) for ids in encoded["input_ids"])
+        ids = [list(i) + [0] * (width - len(i)) for i in encoded["input_ids"]]
+        mask = [list(m) + [0] * (width - len(m)) for m in encoded["attention_mask"]]
+        return {"input_ids": np.array(ids), "attention_mask": np.array(mask)}
+
+
+class FakeSession:
+    # Scores a pair by the sum of its token ids; padding contributes nothing
+
+    def __init__(self, *args, **kwargs):
+        self.shapes = []
+
+    def run(self, outputs, inputs):
+        ids = inputs["input_ids"]
+        self.shapes.append(ids.shape)
+        return [(ids * inputs["attention_mask"]).sum(axis=1, keepdims=True).astype(np.float32)]
+
+
+@pytest.fixture
+def make_reranker(monkeypatch):
+    monkeypatch.setattr(reranker_module.onnxruntime, "InferenceSession", FakeSession)
+    monkeypatch.setattr(
+        reranker_module.AutoTokenizer, "from_pretrained", lambda name: FakeTokenizer()
+    )
+    return lambda **kwargs: ONNXReranker(model_path="model.onnx", **kwargs)
+
+
+def expected(pairs):
+    return [float(sum(ord(c) for c in q + d)) for q, d in pairs]
+
+
+def test_scores_come_back_in_input_order(make_reranker):
+    reranker = make_reranker(max_tokens_per_run=64)
+    pairs = [("q", "d" * n) for n in (40, 3, 25, 1, 12, 30, 7)]
+
+    assert reranker.predict(pairs) == expected(pairs)
+    # Several buckets were needed, none padded past the token budget
+    assert len(reranker.session.shapes) > 1
+    assert all(rows * width <= 64 for rows, width in reranker.session.shapes)
+
+
+def test_buckets_group_similar_lengths(make_reranker):
+    reranker = make_reranker(max_tokens_per_run=99)
+    pairs = [("q", "x" * 49), ("q", "x"), ("q", "x" * 2), ("q", "x" * 48)]
+
+    reranker.predict(pairs)
+
+    # Short pairs share a run instead of being padded to the long ones
+    assert sorted(reranker.session.shapes) == [(1, 49), (1, 50), (2, 3)]
+
+
+def test_single_pair_returns_a_list(make_reranker):
+    reranker = make_reranker()
+    assert reranker.predict([("q", "doc")]) == expected([("q", "doc")])
+
+
+def test_empty_input(make_reranker):
+    reranker = make_reranker()
+    assert reranker.predict([]) == []
+    assert reranker.session.shapes == []
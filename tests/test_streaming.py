@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from ingestion.streaming import iter_json_array, iter_jsonl, iter_payloads
+
+ROWS = [
+    {"text": "Статья 1. [скобки], {фигурные} и \"кавычки\"", "law_number": "1"},
+    {"text": "x" * 300, "metadata": {"case_url": "https://sudact.ru/a/", "list": [1, 2]}},
+    {"text": "", "nested": {"deep": {"deeper": ["]", "}", ","]}}},
+]
+
+
+def write(path, content):
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_matches_json_load(tmp_path, chunk_size):
+    path = write(tmp_path / "rows.json", json.dumps(ROWS, ensure_ascii=False, indent=2))
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == ROWS
+
+
+def test_compact_and_bom(tmp_path):
+    content = "\ufeff" + json.dumps(ROWS, ensure_ascii=False, separators=(",", ":"))
+    path = write(tmp_path / "rows.json", content)
+    assert list(iter_json_array(path, chunk_size=5)) == ROWS
+
+
+def test_empty_array(tmp_path):
+    path = write(tmp_path / "rows.json", " [ \n ] ")
+    assert list(iter_json_array(path)) == []
+
+
+def test_streams_lazily(tmp_path):
+    # The first object comes back before the malformed tail is read
+    path = write(tmp_path / "rows.json", '[{"a": 1}, ' + " " * 100 + "{broken")
+    rows = iter_json_array(path, chunk_size=16)
+    assert next(rows) == {"a": 1}
+    with pytest.raises(json.JSONDecodeError):
+        next(rows)
+
+
+def test_rejects_non_array(tmp_path):
+    path = write(tmp_path / "rows.json", '{"a": 1}')
+    with pytest.raises(ValueError):
+        list(iter_json_array(path))
+
+
+def test_rejects_truncated_array(tmp_path):
+    path = write(tmp_path / "rows.json", '[{"a": 1}, {"b": 2}')
+    with pytest.raises(ValueError):
+        list(iter_json_array(path, chunk_size=4))
+
+
+def test_iter_payloads_dispatches_on_extension(tmp_path):
+    lines = "\n".join(json.dumps(row, ensure_ascii=False) for row in ROWS) + "\n\n"
+    jsonl_path = write(tmp_path / "rows.jsonl", lines)
+    json_path = write(tmp_path / "rows.json", json.dumps(ROWS, ensure_ascii=False))
+
+    assert list(iter_jsonl(jsonl_path)) == ROWS
+    assert list(iter_payloads(jsonl_path)) == ROWS
+    assert list(iter_payloads(json_path)) == ROWS
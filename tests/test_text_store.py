@@ -0,0 +1,142 @@
+import os
+import uuid
+
+from retrieval.text_store import TextStore, TextStoreWriter, open_text_store
+
+IDS = [str(uuid.uuid5(uuid.NAMESPACE_URL, f"chunk:{i}")) for i in range(20)]
+
+
+def build(path, texts, **kwargs):
+    writer = TextStoreWriter(path, **kwargs)
+    for point_id, text in texts.items():
+        writer.put(point_id, text)
+    return writer
+
+
+def files(path, prefix):
+    return sorted(name for name in os.listdir(path) if name.startswith(prefix))
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "store")
+    texts = {point_id: f"Статья {i}. " * (i + 1) for i, point_id in enumerate(IDS)}
+    texts[12345] = "integer ids work too"
+    build(path, texts).commit()
+
+    store = TextStore(path)
+    assert len(store) == len(texts)
+    assert all(store.get(point_id) == text for point_id, text in texts.items())
+    assert store.get(str(uuid.uuid4())) is None
+    assert store.get_many(IDS[:2]) == [texts[IDS[0]], texts[IDS[1]]]
+
+
+def test_empty_text(tmp_path):
+    path = str(tmp_path / "store")
+    build(path, {IDS[0]: ""}).commit()
+    assert TextStore(path).get(IDS[0]) == ""
+
+
+def test_rerun_only_appends_changes(tmp_path):
+    path = str(tmp_path / "store")
+    texts = {point_id: f"text {i}" for i, point_id in enumerate(IDS)}
+    build(path, texts).commit()
+    size = os.path.getsize(os.path.join(path, files(path, "texts.")[0]))
+
+    texts[IDS[3]] = "changed text"
+    writer = build(path, texts)
+    writer.commit()
+
+    assert (writer.written, writer.unchanged) == (1, len(IDS) - 1)
+    blob = files(path, "texts.")[0]
+    assert os.path.getsize(os.path.join(path, blob)) == size + len("changed text")
+    assert TextStore(path).get(IDS[3]) == "changed text"
+
+
+def test_append_keeps_untouched_texts(tmp_path):
+    path = str(tmp_path / "store")
+    build(path, {IDS[0]: "a", IDS[1]: "b"}).commit()
+    build(path, {IDS[2]: "c"}).commit()
+
+    store = TextStore(path)
+    assert [store.get(point_id) for point_id in IDS[:3]] == ["a", "b", "c"]
+
+
+def test_prune_drops_texts_not_put_again(tmp_path):
+    path = str(tmp_path / "store")
+    build(path, {IDS[0]: "a", IDS[1]: "b", IDS[2]: "c"}).commit()
+
+    writer = build(path, {IDS[0]: "a", IDS[2]: "c"})
+    writer.commit()
+    # Readers of the previous collection version still see every text
+    assert TextStore(path).get(IDS[1]) == "b"
+    writer.commit(prune=True)
+    writer.close()
+
+    store = TextStore(path)
+    assert store.get(IDS[1]) is None
+    assert store.get(IDS[0]) == "a" and store.get(IDS[2]) == "c"
+
+
+def test_remove(tmp_path):
+    path = str(tmp_path / "store")
+    writer = build(path, {IDS[0]: "a", IDS[1]: "b"})
+    writer.remove([IDS[0]])
+    writer.commit()
+
+    assert TextStore(path).get(IDS[0]) is None
+    assert TextStore(path).get(IDS[1]) == "b"
+
+
+def test_compaction_rewrites_blob(tmp_path):
+    path = str(tmp_path / "store")
+    build(path, {point_id: "old " * 50 for point_id in IDS}).commit()
+    assert files(path, "texts.") == ["texts.0.bin"]
+
+    # Every text changes, so more than half of the blob is dead afterwards
+    texts = {point_id: f"new {i}" for i, point_id in enumerate(IDS)}
+    writer = build(path, texts, compact_ratio=0.5)
+    writer.commit()
+
+    blob = files(path, "texts.")
+    assert blob != ["texts.0.bin"] and len(blob) == 1
+    assert os.path.getsize(os.path.join(path, blob[0])) == sum(map(len, texts.values()))
+    assert files(path, "index.") == [f"index.{writer.generation}.npy"]
+    store = TextStore(path)
+    assert all(store.get(point_id) == text for point_id, text in texts.items())
+
+
+def test_compacted_writer_still_detects_unchanged_texts(tmp_path):
+    path = str(tmp_path / "store")
+    build(path, {IDS[0]: "old " * 50, IDS[1]: "keep"}).commit()
+    writer = build(path, {IDS[0]: "new", IDS[1]: "keep"})
+    writer.commit()
+
+    # Offsets now point into the compacted blob
+    writer.put(IDS[1], "keep")
+    writer.put(IDS[0], "new")
+    assert writer.unchanged == 3
+    writer.commit(prune=True)
+    writer.close()
+
+    store = TextStore(path)
+    assert (store.get(IDS[0]), store.get(IDS[1])) == ("new", "keep")
+
+
+def test_reader_picks_up_new_manifest(tmp_path):
+    path = str(tmp_path / "store")
+    build(path, {IDS[0]: "v1"}).commit()
+    cached = TextStore(path, refresh_seconds=3600)
+    fresh = TextStore(path, refresh_seconds=0)
+
+    build(path, {IDS[0]: "v2", IDS[1]: "added"}).commit()
+
+    assert fresh.get(IDS[0]) == "v2" and fresh.get(IDS[1]) == "added"
+    # Until its next refresh a reader keeps serving the generation it mapped
+    assert cached.get(IDS[0]) == "v1" and cached.get(IDS[1]) is None
+
+
+def test_open_text_store_without_manifest(tmp_path):
+    assert open_text_store("missing", root=str(tmp_path)) is None
+
+    build(str(tmp_path / "present"), {IDS[0]: "a"}).commit()
+    assert open_text_store("present", root=str(tmp_path)).get(IDS[0]) == "a"